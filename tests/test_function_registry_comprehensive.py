@@ -5,8 +5,10 @@ Comprehensive tests for the VidPipe function registry
 import pytest
 from unittest.mock import Mock, patch
 import numpy as np
-from vidpipe.functions import FunctionRegistry, FunctionDef, _require_cv2
-from vidpipe.pipeline import Frame, FrameFormat
+from vidpipe.functions import (
+    FunctionRegistry, FunctionDef, _require_cv2, _get_orb
+)
+from vidpipe.pipeline import Frame, FrameFormat, FramePool, cast_frame
 
 
 def dummy_source_function(**kwargs):
@@ -102,6 +104,13 @@ class TestFunctionRegistryBasics:
         func_def = registry.get_function("test_with_params")
         assert func_def is not None
         assert func_def.parameters == params
+    
+    def test_registered_names_are_interned(self):
+        import sys
+        
+        registry = FunctionRegistry()
+        registry.register("".join(["my-", "filter"]), dummy_filter_function)
+        assert registry.get_function("my-filter").name is sys.intern("my-filter")
 
 
 class TestBuiltinFunctions:
@@ -209,6 +218,472 @@ class TestFunctionExecution:
         assert result_frame.height == test_frame.height
 
 
+class TestMathematicalFilters:
+    """Test saturation behaviour of the arithmetic filters"""
+
+    def _frame(self, values):
+        data = np.array([[values]], dtype=np.uint8)
+        return Frame(data=data, format=FrameFormat.BGR, width=1, height=1, timestamp=0.0)
+
+    def test_add_and_subtract_saturate(self):
+        registry = FunctionRegistry()
+        frame = self._frame([5, 100, 250])
+
+        added = registry.get_function("add").function(frame, value=10)
+        subtracted = registry.get_function("subtract").function(frame, value=10)
+
+        assert added.data.tolist() == [[[15, 110, 255]]]
+        assert subtracted.data.tolist() == [[[0, 90, 240]]]
+
+    def test_multiply_and_divide_saturate(self):
+        registry = FunctionRegistry()
+        frame = self._frame([0, 100, 200])
+
+        multiplied = registry.get_function("multiply").function(frame, value=2)
+        divided = registry.get_function("divide").function(frame, value=2)
+        negative = registry.get_function("multiply").function(frame, value=-1)
+
+        assert multiplied.data.tolist() == [[[0, 200, 255]]]
+        assert divided.data.tolist() == [[[0, 50, 100]]]
+        assert negative.data.tolist() == [[[0, 0, 0]]]
+
+        # Scaled values round to nearest rather than truncate
+        frame = self._frame([7, 100, 200])
+        multiplied = registry.get_function("multiply").function(frame, value=1.1)
+        divided = registry.get_function("divide").function(frame, value=3)
+        assert multiplied.data.tolist() == [[[8, 110, 220]]]
+        assert divided.data.tolist() == [[[2, 33, 67]]]
+
+    def test_pointwise_filters_match_float_formulas(self):
+        registry = FunctionRegistry()
+        values = np.arange(256, dtype=np.uint8).reshape(16, 16)
+        frame = Frame(data=values, format=FrameFormat.GRAY, width=16, height=16, timestamp=0.0)
+        x = values.astype(np.float32)
+
+        squared = registry.get_function("square").function(frame)
+        powered = registry.get_function("power").function(frame, power=0.5)
+
+        assert np.array_equal(squared.data, np.clip((x / 255.0) ** 2 * 255, 0, 255).astype(np.uint8))
+        assert np.array_equal(powered.data, np.clip((x / 255.0) ** 0.5 * 255, 0, 255).astype(np.uint8))
+
+    def test_pointwise_filters_accept_float_and_uint16_frames(self):
+        registry = FunctionRegistry()
+        for dtype in (np.float32, np.uint16):
+            data = np.array([[[0, 100, 300]]], dtype=dtype)
+            frame = Frame(data=data, format=FrameFormat.BGR, width=1, height=1, timestamp=0.0)
+            x = data.astype(np.float32)
+
+            powered = registry.get_function("power").function(frame, power=0.5)
+            logged = registry.get_function("log").function(frame)
+            exposed = registry.get_function("exposure").function(frame, stops=1)
+
+            assert powered.data.tolist() == np.clip((x / 255.0) ** 0.5 * 255, 0, 255).astype(np.uint8).tolist()
+            assert logged.data.tolist() == np.clip(np.log(x + 1) * 255 / np.log(256), 0, 255).astype(np.uint8).tolist()
+            assert exposed.data.tolist() == [[[0, 200, 255]]]
+
+
+class TestSegmentationFilters:
+    """Test segmentation filters on small synthetic frames"""
+
+    def test_region_growing_stops_at_threshold(self):
+        registry = FunctionRegistry()
+        data = np.full((5, 5), 200, dtype=np.uint8)
+        data[1:4, 1:4] = 100
+        data[2, 2] = 105
+        frame = Frame(data=data, format=FrameFormat.GRAY, width=5, height=5, timestamp=0.0)
+
+        result = registry.get_function("region-growing").function(frame, threshold=10)
+
+        expected = np.zeros((5, 5), dtype=np.uint8)
+        expected[1:4, 1:4] = 255
+        assert np.array_equal(result.data, expected)
+
+    def test_black_white_fused_matches_two_pass(self, monkeypatch):
+        from vidpipe import functions
+
+        data = np.random.default_rng(7).integers(0, 256, (32, 48, 3), dtype=np.uint8)
+        frame = Frame(data=data, format=FrameFormat.BGR, width=48, height=32, timestamp=0.0)
+
+        fused = [functions.black_white_filter(frame, threshold=t).data for t in (0, 90.6, 127, 255)]
+        monkeypatch.setattr(functions, "njit", None)
+        two_pass = [functions.black_white_filter(frame, threshold=t).data for t in (0, 90.6, 127, 255)]
+
+        for a, b in zip(fused, two_pass):
+            assert np.array_equal(a, b)
+
+    def test_watershed_outputs_do_not_share_scratch(self):
+        registry = FunctionRegistry()
+        watershed = registry.get_function("watershed").function
+        data = np.full((40, 40, 3), 220, dtype=np.uint8)
+        data[10:30, 10:30] = 30
+        frame = Frame(data=data, format=FrameFormat.BGR, width=40, height=40, timestamp=0.0)
+
+        first = watershed(frame)
+        snapshot = first.data.copy()
+        second = watershed(Frame(data=255 - data, format=FrameFormat.BGR, width=40, height=40, timestamp=1.0))
+
+        assert first.data is not second.data
+        assert np.array_equal(first.data, snapshot)
+
+    def test_kmeans_maps_pixels_to_cluster_colors(self):
+        registry = FunctionRegistry()
+        data = np.zeros((32, 32, 3), dtype=np.uint8)
+        data[:, 16:] = (10, 200, 30)
+        frame = Frame(data=data, format=FrameFormat.BGR, width=32, height=32, timestamp=0.0)
+
+        result = registry.get_function("kmeans").function(frame, k=2)
+
+        assert result.data.shape == data.shape
+        assert np.array_equal(result.data, data)
+
+
+class TestFramePool:
+    """Test output buffer recycling through the frame pool"""
+
+    def _frame(self):
+        data = np.arange(60, dtype=np.uint8).reshape(4, 5, 3)
+        return Frame(data=data, format=FrameFormat.BGR, width=5, height=4, timestamp=0.0)
+
+    def test_buffer_recycled_after_frame_released(self):
+        registry = FunctionRegistry()
+        invert = registry.get_function("invert").function
+        frame = self._frame()
+
+        first = invert(frame)
+        address = first.data.ctypes.data
+        del first
+        second = invert(frame)
+
+        assert second.data.ctypes.data == address
+        assert np.array_equal(second.data, 255 - frame.data)
+
+    def test_buffer_kept_while_still_referenced(self):
+        registry = FunctionRegistry()
+        invert = registry.get_function("invert").function
+        frame = self._frame()
+
+        first = invert(frame)
+        view = first.data[0]
+        del first
+        second = invert(frame)
+
+        assert not np.shares_memory(second.data, view)
+
+    def test_inplace_invert_reuses_input(self):
+        registry = FunctionRegistry()
+        invert = registry.get_function("invert").function
+        frame = self._frame()
+        expected = 255 - frame.data
+
+        result = invert(frame, inplace=True)
+        assert result is frame
+        assert np.array_equal(frame.data, expected)
+
+        frame.data.flags.writeable = False
+        copied = invert(frame, inplace=True)
+        assert copied is not frame
+        assert np.array_equal(copied.data, 255 - expected)
+
+    def test_buffer_reclaimed_only_when_no_view_remains(self):
+        pool = FramePool()
+        free = pool.free[((4, 5, 3), np.dtype(np.uint8))]
+        kept = pool.acquire((4, 5, 3))
+        address = kept.ctypes.data
+        view = kept[1:3]
+        del kept
+
+        assert not free
+        del view
+        assert len(free) == 1
+        assert pool.acquire((4, 5, 3)).ctypes.data == address
+
+    def test_unrelated_arrays_never_enter_the_pool(self):
+        frame = self._frame()
+        big = np.zeros((64, 5, 3), dtype=np.uint8)
+        copy = frame.copy()
+        kept = copy.data
+        del copy, kept
+        # Frames over views of another array, which may land at the address
+        # of the pooled array that just died
+        for _ in range(2000):
+            Frame(data=big[:4], format=FrameFormat.BGR, width=5, height=4, timestamp=0.0)
+
+        copies = [frame.copy() for _ in range(8)]
+        for copy in copies:
+            copy.data[:] = 255
+        assert not big.any()
+
+    def test_kept_copy_cow_and_cast_buffers_are_not_reissued(self):
+        frame = self._frame()
+        shared = frame.share()
+        kept = [frame.copy().data, shared.cow_mutate(), cast_frame(frame, np.float32).data]
+        del shared
+        snapshots = [data.copy() for data in kept]
+
+        fresh = [frame.copy() for _ in range(4)] + [cast_frame(frame, np.float32) for _ in range(4)]
+        for copy in fresh:
+            copy.data[:] = 0
+        assert not any(np.shares_memory(copy.data, data) for copy in fresh for data in kept)
+        assert all(np.array_equal(data, snapshot) for data, snapshot in zip(kept, snapshots))
+
+    def test_frame_uploads_through_pinned_buffer(self):
+        cuda = pytest.importorskip("numba.cuda")
+        if not cuda.is_available():
+            pytest.skip("CUDA is not available")
+        frame = self._frame()
+
+        stream = cuda.stream()
+        device = frame.to_device(stream)
+        stream.synchronize()
+
+        assert np.array_equal(device.copy_to_host(), frame.data)
+
+    def test_frame_uses_slots(self):
+        frame = self._frame()
+        frame.metadata["source"] = "test"
+
+        assert not hasattr(frame, "__dict__")
+        with pytest.raises(AttributeError):
+            frame.extra = 1
+        assert frame.copy().metadata == {"source": "test"}
+
+    def test_frame_data_is_made_contiguous(self):
+        data = np.arange(120, dtype=np.uint8).reshape(4, 10, 3)
+        frame = Frame(data=data[:, ::2], format=FrameFormat.BGR, width=5, height=4, timestamp=0.0)
+        kept = Frame(data=data, format=FrameFormat.BGR, width=10, height=4, timestamp=0.0)
+
+        assert frame.data.flags.c_contiguous
+        assert np.array_equal(frame.data, data[:, ::2])
+        assert kept.data is data
+
+    def test_frame_copy_uses_pooled_buffer(self):
+        frame = self._frame()
+
+        first = frame.copy()
+        address = first.data.ctypes.data
+        del first
+        second = frame.copy()
+
+        assert second.data.ctypes.data == address
+        assert second.data is not frame.data
+        assert np.array_equal(second.data, frame.data)
+
+
+class TestFeatureDetectors:
+    """Test detector reuse across frames and stage threads"""
+
+    def test_detectors_cached_per_thread(self):
+        import threading
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(_get_orb()))
+        thread.start()
+        thread.join()
+
+        assert _get_orb() is _get_orb()
+        assert other[0] is not _get_orb()
+
+    def test_template_match_reuses_decoded_template(self, tmp_path):
+        cv2 = pytest.importorskip("cv2")
+        from vidpipe.functions import _load_template
+
+        data = np.zeros((40, 60, 3), dtype=np.uint8)
+        data[10:20, 30:45] = 255
+        data[12:18, 33:42] = 40
+        path = str(tmp_path / "template.png")
+        cv2.imwrite(path, cv2.cvtColor(data[8:22, 28:47], cv2.COLOR_BGR2GRAY))
+        frame = Frame(data=data, format=FrameFormat.BGR, width=60, height=40, timestamp=0.0)
+        match = FunctionRegistry().get_function("template-match").function
+
+        first = match(frame, template=path)
+        hits = _load_template.cache_info().hits
+        second = match(frame, template=path)
+
+        assert _load_template.cache_info().hits == hits + 1
+        assert np.array_equal(first.data, second.data)
+        assert first.data[8, 28].tolist() == [0, 255, 0]
+
+
+class TestNoiseFilters:
+    """Test noise filters keep the frame layout and saturate to uint8"""
+
+    def test_noise_filters_saturate(self):
+        registry = FunctionRegistry()
+        data = np.zeros((16, 16, 3), dtype=np.uint8)
+        data[:, 8:] = 255
+        frame = Frame(data=data, format=FrameFormat.BGR, width=16, height=16, timestamp=0.0)
+
+        noisy = registry.get_function("gaussian-noise").function(frame, std=100)
+        speckled = registry.get_function("speckle").function(frame, variance=0.5)
+
+        assert noisy.data.dtype == np.uint8 and noisy.data.shape == data.shape
+        assert noisy.data[:, :8].min() == 0 and noisy.data[:, 8:].max() == 255
+        assert speckled.data.dtype == np.uint8 and speckled.data.shape == data.shape
+        assert not speckled.data[:, :8].any()
+
+    def test_vintage_noise_is_signed(self):
+        pytest.importorskip("cv2")
+        from vidpipe.functions import _SEPIA_MATRIX, _VINTAGE_DESATURATE
+        import cv2
+
+        registry = FunctionRegistry()
+        data = np.full((64, 64, 3), 128, dtype=np.uint8)
+        frame = Frame(data=data, format=FrameFormat.BGR, width=64, height=64, timestamp=0.0)
+
+        result = registry.get_function("vintage").function(frame)
+        toned = cv2.transform(cv2.transform(data, _SEPIA_MATRIX), _VINTAGE_DESATURATE)
+        drift = result.data.astype(np.float64) - toned
+
+        assert result.data.dtype == np.uint8 and result.data.shape == data.shape
+        assert abs(drift.mean()) < 1.5
+        assert 20 < drift.std() < 30
+
+    def test_vintage_matches_sepia_then_hsv_desaturation_on_bright_frames(self):
+        cv2 = pytest.importorskip("cv2")
+        from vidpipe.functions import vintage_filter
+
+        data = np.random.default_rng(0).integers(150, 256, (64, 64, 3), dtype=np.uint8)
+        frame = Frame(data=data, format=FrameFormat.BGR, width=64, height=64, timestamp=0.0)
+
+        cv2.setRNGSeed(7)
+        result = vintage_filter(frame)
+
+        # Saturated sepia, HSV saturation scaled by 0.6, then the same noise
+        sepia = cv2.transform(data, np.array([[0.272, 0.534, 0.131],
+                                              [0.349, 0.686, 0.168],
+                                              [0.393, 0.769, 0.189]], dtype=np.float32))
+        hsv = cv2.cvtColor(sepia, cv2.COLOR_BGR2HSV)
+        hsv[:, :, 1] = hsv[:, :, 1] * 0.6
+        toned = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+        cv2.setRNGSeed(7)
+        noise = np.empty(data.shape, dtype=np.int16)
+        cv2.randn(noise, (0, 0, 0), (25, 25, 25))
+        expected = cv2.add(toned, noise, dtype=cv2.CV_8U)
+
+        assert np.abs(result.data.astype(np.int16) - expected).max() <= 1
+
+
+class TestSinkRendering:
+    """Test sink rendering helpers"""
+
+    def test_histogram_bars_match_rectangles(self):
+        cv2 = pytest.importorskip("cv2")
+        from vidpipe.functions import _fill_histogram_bars
+
+        hist = np.random.default_rng(3).integers(0, 401, (256, 1)).astype(np.float32)
+        hist[::7] = 0
+        expected = np.zeros((400, 512, 3), dtype=np.uint8)
+        for i in range(256):
+            cv2.rectangle(expected, (i * 2, 400), (i * 2 + 2, 400 - int(hist[i, 0])), (0, 255, 0), -1)
+        actual = np.zeros_like(expected)
+        _fill_histogram_bars(actual, hist, (0, 255, 0))
+
+        assert np.array_equal(actual, expected)
+
+    def test_bgr_histograms_match_calc_hist(self):
+        cv2 = pytest.importorskip("cv2")
+        from vidpipe.functions import _bgr_histograms
+
+        data = np.random.default_rng(5).integers(0, 256, (24, 32, 3), dtype=np.uint8)
+
+        for source in (data, data[:, ::2]):
+            expected = [cv2.calcHist([source], [i], None, [256], [0, 256]).ravel() for i in range(3)]
+            assert np.array_equal(_bgr_histograms(source), np.stack(expected))
+
+
+class TestExportSinks:
+    """Test file export sinks"""
+
+    def test_csv_export_keeps_file_open(self, tmp_path):
+        from vidpipe.functions import CsvExportSink
+
+        sink = CsvExportSink(flush_every=2)
+        filename = str(tmp_path / "stats.csv")
+        data = np.arange(48, dtype=np.uint8).reshape(4, 4, 3)
+        frame = Frame(data=data, format=FrameFormat.BGR, width=4, height=4, timestamp=1.5)
+
+        assert sink(frame, filename=filename)
+        assert sink(frame, filename=filename)
+        assert sink(frame, filename=filename)
+        sink.close()
+
+        lines = (tmp_path / "stats.csv").read_text().splitlines()
+        assert lines[0] == "timestamp,width,height,format,mean,std,min,max"
+        assert len(lines) == 4
+        row = lines[1].split(",")
+        assert float(row[4]) == pytest.approx(data.mean())
+        assert float(row[5]) == pytest.approx(data.std())
+        assert row[6:] == ["0", "47"]
+
+    def test_json_export_with_and_without_orjson(self, tmp_path, monkeypatch):
+        import json
+        from vidpipe import functions
+
+        frame = Frame(data=np.zeros((2, 3, 3), dtype=np.uint8), format=FrameFormat.BGR,
+                      width=3, height=2, timestamp=2.0, metadata={"label": "a", "count": 3})
+        expected = {"timestamp": 2.0, "width": 3, "height": 2, "format": "bgr",
+                    "metadata": {"label": "a", "count": 3}}
+
+        first = tmp_path / "fast.json"
+        assert functions.json_export_sink(frame, filename=str(first))
+        monkeypatch.setattr(functions, "orjson", None)
+        second = tmp_path / "stdlib.json"
+        assert functions.json_export_sink(frame, filename=str(second))
+
+        assert json.loads(first.read_text()) == expected
+        assert json.loads(second.read_text()) == expected
+
+
+class TestGeneratedSources:
+    """Test generated sources"""
+
+    def test_solid_color_reuses_buffer(self):
+        registry = FunctionRegistry()
+        source = registry.get_function("solid-color").function
+
+        first = source(None, width=8, height=4, color=[10, 20])
+        second = source(None, width=8, height=4, color=[10, 20])
+
+        assert first.data is second.data
+        assert not first.data.flags.writeable
+        assert first.data[0, 0].tolist() == [10, 20, 0]
+        assert first.copy().data.flags.writeable
+
+    def test_random_noise_shapes(self):
+        registry = FunctionRegistry()
+        source = registry.get_function("random-noise").function
+
+        for noise_type in ("uniform", "gaussian"):
+            result = source(None, width=8, height=4, noise_type=noise_type)
+            assert result.data.shape == (4, 8, 3)
+            assert result.data.dtype == np.uint8
+
+    def test_mandelbrot_axes_cached_per_view(self):
+        from vidpipe.functions import _mandelbrot_axes
+
+        x, y = _mandelbrot_axes(32, 16, 2.0, -0.5, 0.0)
+
+        assert _mandelbrot_axes(32, 16, 2.0, -0.5, 0.0)[0] is x
+        assert _mandelbrot_axes(32, 16, 4.0, -0.5, 0.0)[0] is not x
+        assert not x.flags.writeable and not y.flags.writeable
+        assert x.shape == (32,) and y.shape == (16,)
+
+    def test_mandelbrot_paths_agree(self, monkeypatch):
+        from vidpipe import functions
+
+        wide = dict(width=64, height=48, zoom=2.0, center_x=-0.7, center_y=0.2)
+        deep = dict(width=64, height=48, zoom=400.0, center_x=-0.7435, center_y=0.1314)
+        compiled = [functions.mandelbrot_source(None, **params) for params in (wide, deep)]
+        monkeypatch.setattr(functions, "njit", None)
+        fallback = [functions.mandelbrot_source(None, **params) for params in (wide, deep)]
+
+        assert compiled[0].data.shape == (48, 64, 3)
+        # Wide views iterate in float32 without numba; only boundary pixels may differ
+        assert (compiled[0].data != fallback[0].data).any(axis=2).mean() < 0.02
+        # Deep zooms keep float64 and match exactly
+        assert np.array_equal(compiled[1].data, fallback[1].data)
+
+
 class TestOpenCVIntegration:
     """Test OpenCV integration and requirements"""
     
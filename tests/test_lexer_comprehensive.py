@@ -274,4 +274,55 @@ class TestLexerPositioning:
         assert tokens[1].column == 3
         
         assert tokens[2].line == 1
-        assert tokens[2].column == 6
\ No newline at end of file
+        assert tokens[2].column == 6
+
+
+class _NonAscii(str):
+    """Source string that routes tokenize() through the character loop"""
+    
+    def isascii(self):
+        return False
+
+
+class TestLexerScanPaths:
+    """Test that the regex scanner and the character loop agree"""
+    
+    SOURCES = [
+        'pipeline p = webcam -> blur with (kernel_size: 5, name: "a\\"b\\n")\n',
+        "# comment\ncam [3]-> (edge &> -invert) | x +> y @ 2.5s ~> z => w",
+        "a\n  'multi\nline' b",
+    ]
+    
+    def test_paths_produce_identical_tokens(self):
+        for source in self.SOURCES:
+            assert Lexer(source).tokenize() == Lexer(_NonAscii(source)).tokenize()
+    
+    def test_non_ascii_source_uses_character_loop(self):
+        tokens = Lexer("caméra -> display").tokenize()
+        assert tokens[0].value == "caméra"
+        assert tokens[1].type == TokenType.SYNC_PIPE
+    
+    def test_error_position_matches(self):
+        with pytest.raises(SyntaxError, match="line 2, column 3: Unexpected character: \\$"):
+            Lexer("a\nb $").tokenize()
+    
+    def test_identifiers_are_interned(self):
+        import sys
+        
+        for source in ("my-filter -> with", _NonAscii("my-filter -> with")):
+            tokens = Lexer(source).tokenize()
+            assert tokens[0].value is sys.intern("my-filter")
+            assert tokens[2].type == TokenType.WITH
+    
+    def test_character_classes_cover_non_ascii(self):
+        tokens = Lexer("# né\nréglage -é 3").tokenize()
+        assert [(t.type, t.value, t.line, t.column) for t in tokens[:3]] == [
+            (TokenType.IDENTIFIER, "réglage", 2, 1),
+            (TokenType.IDENTIFIER, "-é", 2, 9),
+            (TokenType.NUMBER, 3, 2, 12),
+        ]
+    
+    def test_tokens_have_no_instance_dict(self):
+        token = Lexer("blur").tokenize()[0]
+        assert not hasattr(token, "__dict__")
+        assert token == Token(TokenType.IDENTIFIER, "blur", 1, 1)
@@ -2,13 +2,14 @@
 Comprehensive tests for the VidPipe parser
 """
 
+import sys
 import pytest
 from vidpipe.lexer import Lexer
 from vidpipe.parser import Parser
 from vidpipe.ast_nodes import (
     FunctionNode, PipelineNode, PipelineType, ParallelNode, 
     MergeNode, ChoiceNode, PipelineDefinitionNode, ProgramNode,
-    PipelineReferenceNode
+    PipelineReferenceNode, GroupNode, LoopNode
 )
 
 
@@ -267,6 +268,26 @@ class TestParserOperatorPrecedence:
         # Current implementation may not handle precedence as expected
         # Let's just test that it parses without error
         assert ast.main_pipeline is not None
+    
+    def test_same_operator_collects_operands(self):
+        ast = Parser(Lexer("a &> b &> c | d -> e | f").tokenize()).parse()
+        
+        choice = ast.main_pipeline
+        assert isinstance(choice, ChoiceNode) and len(choice.options) == 3
+        assert isinstance(choice.options[0], ParallelNode)
+        assert [branch.name for branch in choice.options[0].branches] == ["a", "b", "c"]
+        assert isinstance(choice.options[1], PipelineNode)
+    
+    def test_grouped_operands_are_not_flattened(self):
+        ast = Parser(Lexer("(a &> b) &> c +> d").tokenize()).parse()
+        
+        merge = ast.main_pipeline
+        assert isinstance(merge, MergeNode) and merge.output.name == "d"
+        assert len(merge.inputs) == 1 and len(merge.inputs[0].branches) == 2
+    
+    def test_merge_does_not_chain(self):
+        with pytest.raises(SyntaxError, match="Unexpected token"):
+            Parser(Lexer("a +> b +> c").tokenize()).parse()
 
 
 class TestParserEdgeCases:
@@ -318,4 +339,72 @@ class TestParserWhitespaceAndComments:
         
         # Should parse correctly across multiple lines
         assert isinstance(ast.main_pipeline, PipelineNode)
-        assert isinstance(ast.main_pipeline.left, PipelineNode)
\ No newline at end of file
+        assert isinstance(ast.main_pipeline.left, PipelineNode)
+
+class TestParserTokenArrays:
+    """Test the precomputed token type and value arrays"""
+    
+    def test_arrays_track_tokens(self):
+        tokens = Lexer("cam with (k: 3) -> show").tokenize()
+        parser = Parser(tokens)
+        
+        assert list(parser.types) == [token.type.value for token in tokens]
+        assert parser.values == [token.value for token in tokens]
+        
+        parser.advance()
+        assert parser.current_token is tokens[1]
+    
+    def test_advance_stops_at_eof(self):
+        tokens = Lexer("cam").tokenize()
+        parser = Parser(tokens)
+        
+        parser.advance()
+        parser.advance()
+        assert parser.current_token is tokens[-1]
+
+
+class _ForwardOnlyParser(Parser):
+    """Parser that fails if it ever rewinds to re-parse earlier tokens"""
+    
+    @property
+    def position(self):
+        return self._position
+    
+    @position.setter
+    def position(self, value):
+        assert value >= getattr(self, "_position", 0), "parser backtracked"
+        self._position = value
+
+
+class TestParserLinearTime:
+    """Test that parsing never re-reads consumed tokens"""
+    
+    def test_operator_heavy_input_parses_forward_only(self):
+        nested = "a"
+        for depth in range(30):
+            nested = f"({nested} | b &> c -> d)"
+        source = " | ".join([nested] * 20) + " +> out"
+        
+        ast = _ForwardOnlyParser(Lexer(source).tokenize()).parse()
+        
+        assert isinstance(ast.main_pipeline, MergeNode)
+        assert len(ast.main_pipeline.inputs[0].options) == 20
+
+
+class TestParserNestingDepth:
+    """Test that nesting depth does not consume Python stack"""
+    
+    def test_deeply_nested_groups_and_loops(self):
+        depth = sys.getrecursionlimit() * 2
+        source = "(" * depth + "{a -> b &> c}" + ")" * depth
+        
+        node = Parser(Lexer(source).tokenize()).parse().main_pipeline
+        for _ in range(depth):
+            assert isinstance(node, GroupNode)
+            node = node.content
+        assert isinstance(node, LoopNode)
+        assert isinstance(node.pipeline, ParallelNode)
+    
+    def test_unclosed_inner_group_reports_missing_paren(self):
+        with pytest.raises(SyntaxError, match="Expected RPAREN"):
+            Parser(Lexer("((a -> b) &> (c -> d)").tokenize()).parse()
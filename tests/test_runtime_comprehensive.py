@@ -2,14 +2,17 @@
 Comprehensive tests for the VidPipe runtime
 """
 
+import threading
+import time
 import pytest
+import numpy as np
 from unittest.mock import Mock, patch
 from vidpipe.lexer import Lexer
 from vidpipe.parser import Parser
 from vidpipe.runtime import Runtime
 from vidpipe.ast_nodes import FunctionNode, PipelineReferenceNode
-from vidpipe.functions import FunctionRegistry
-from vidpipe.pipeline import Frame, FrameFormat
+from vidpipe.functions import FunctionRegistry, bgr2hsv_filter, hsv2bgr_filter
+from vidpipe.pipeline import Frame, FrameFormat, Pipeline, PipelineNode, Queue, cast_frame
 
 
 class TestRuntimeBasics:
@@ -157,6 +160,11 @@ class TestRuntimeErrorHandling:
         except Exception as e:
             # If it raises an error, it should be meaningful
             assert isinstance(e, (ValueError, KeyError, TypeError, RuntimeError, AttributeError))
+    
+    def test_self_referencing_definition(self):
+        ast = Parser(Lexer("pipeline loop = blur -> loop\nloop").tokenize()).parse()
+        with pytest.raises(RuntimeError, match="refers to itself"):
+            Runtime().compile(ast)
 
 
 class TestRuntimeIntegration:
@@ -179,6 +187,31 @@ class TestRuntimeIntegration:
         assert hasattr(pipeline, 'nodes')
         assert hasattr(pipeline, 'connections')
     
+    def test_compile_deep_chain(self):
+        """Long chains nest deeper than the recursion limit"""
+        source = " -> ".join(["test-pattern"] + ["invert"] * 3000 + ["display"])
+        pipeline = Runtime().compile(Parser(Lexer(source).tokenize()).parse())
+        assert len(pipeline.nodes) == 3002
+        assert len(pipeline.connections) == 3001
+    
+    def test_repeated_reference_gets_its_own_nodes(self):
+        source = ("pipeline p = blur -> (invert &> edges @ 2 s) -> grayscale\n"
+                  "test-pattern -> p -> p @ 1 s -> display")
+        runtime = Runtime()
+        pipeline = runtime.compile(Parser(Lexer(source).tokenize()).parse())
+        names = [node.name for node in pipeline.nodes]
+        assert names == ["test-pattern_1", "blur_2", "invert_3", "edges_4",
+                         "grayscale_5", "blur_6", "invert_7", "edges_8",
+                         "grayscale_9", "display_10"]
+        assert runtime.timing_info == {"edges_4": 2.0, "edges_8": 2.0, "grayscale_9": 1.0}
+    
+    def test_parallel_into_parallel_connects_every_pair(self):
+        source = "test-pattern -> (blur &> invert) -> (grayscale &> sepia) -> display"
+        pipeline = Runtime().compile(Parser(Lexer(source).tokenize()).parse())
+        edges = {(a.name, b.name) for a, b, _ in pipeline.connections}
+        assert {("blur_2", "grayscale_4"), ("blur_2", "sepia_5"),
+                ("invert_3", "grayscale_4"), ("invert_3", "sepia_5")} <= edges
+    
     def test_compile_complex_expression(self):
         """Test compilation of complex expressions"""
         runtime = Runtime()
@@ -312,4 +345,402 @@ class TestRuntimeEdgeCases:
         # Both should be valid but different
         assert pipeline1 is not None
         assert pipeline2 is not None
-        assert pipeline1 is not pipeline2
\ No newline at end of file
+        assert pipeline1 is not pipeline2
+
+def finite_source(count):
+    """Source function producing `count` small BGR frames, then end of stream"""
+    frames = iter(range(count))
+    
+    def source(frame, **kwargs):
+        index = next(frames, None)
+        if index is None:
+            return None
+        data = np.full((8, 8, 3), (10 * index, 100, 200), dtype=np.uint8)
+        return Frame(data=data, format=FrameFormat.BGR, width=8, height=8,
+                     timestamp=float(index))
+    
+    return source
+
+
+class TestRuntimeStageFusion:
+    """Test fusion of colour-space round trips when a pipeline starts"""
+    
+    def _compile(self, source):
+        runtime = Runtime()
+        pipeline = runtime.compile(Parser(Lexer(source).tokenize()).parse())
+        pipeline.fuse_linear_chains()
+        return runtime, pipeline
+    
+    def test_round_trip_is_fused_into_one_node(self):
+        _, pipeline = self._compile(
+            "test-pattern -> bgr2hsv -> multiply with (value: 1.2) -> hsv2bgr -> display")
+        
+        names = [node.name for node in pipeline.nodes]
+        assert len(names) == 3
+        assert names[1] == "bgr2hsv_2+multiply_3+hsv2bgr_4"
+        assert len(pipeline.connections) == 2
+    
+    def test_unmatched_conversion_is_not_fused(self):
+        _, pipeline = self._compile("test-pattern -> bgr2hsv -> display")
+        
+        assert len(pipeline.nodes) == 3
+    
+    def test_async_pipe_splits_round_trip(self):
+        _, pipeline = self._compile("test-pattern -> bgr2hsv ~> hsv2bgr -> display")
+        
+        names = [node.name for node in pipeline.nodes]
+        assert names == ["test-pattern_1", "bgr2hsv_2", "hsv2bgr_3", "display_4"]
+        assert [(a.name, b.name) for a, b, q in pipeline.connections
+                if q in pipeline.async_queues] == [("bgr2hsv_2", "hsv2bgr_3")]
+    
+    def test_timed_head_keeps_its_name(self):
+        runtime, pipeline = self._compile(
+            "test-pattern -> bgr2hsv @ 5 s -> blur -> hsv2bgr -> display")
+        
+        names = [node.name for node in pipeline.nodes]
+        assert names == ["test-pattern_1", "bgr2hsv_2", "blur_3+hsv2bgr_4", "display_5"]
+        assert runtime.timing_info == {"bgr2hsv_2": 5.0}
+    
+    def test_fused_pipeline_produces_same_frames(self):
+        runtime = Runtime()
+        collected = []
+        runtime.registry.register("frames", finite_source(5), is_source=True)
+        runtime.registry.register("collect", lambda frame, **kwargs: collected.append(frame),
+                                  is_sink=True)
+        
+        tokens = Lexer("frames -> bgr2hsv -> hsv2bgr -> collect").tokenize()
+        runtime.execute(Parser(tokens).parse())
+        
+        expected_source = finite_source(5)
+        expected = [hsv2bgr_filter(bgr2hsv_filter(expected_source(None))) for _ in range(5)]
+        assert [f.timestamp for f in collected] == [f.timestamp for f in expected]
+        for got, want in zip(collected, expected):
+            assert np.array_equal(got.data, want.data)
+
+
+class TestPipelineChainFusion:
+    """Test fusion of linear transform chains when a pipeline starts"""
+    
+    def _runtime(self, collected):
+        runtime = Runtime()
+        runtime.registry.register("frames", finite_source(3), is_source=True)
+        runtime.registry.register("collect", lambda frame, **kwargs: collected.append(frame),
+                                  is_sink=True)
+        return runtime
+    
+    def test_linear_chain_runs_as_one_node(self):
+        collected = []
+        runtime = self._runtime(collected)
+        
+        tokens = Lexer("frames -> invert -> grayscale -> blur -> collect").tokenize()
+        runtime.execute(Parser(tokens).parse())
+        
+        names = [node.name for node in runtime.pipeline.nodes]
+        assert names == ["frames_1", "invert_2+grayscale_3+blur_4", "collect_5"]
+        assert len(runtime.pipeline.connections) == 2
+        assert [f.timestamp for f in collected] == [0.0, 1.0, 2.0]
+        assert all(f.format == FrameFormat.GRAY for f in collected)
+    
+    def test_async_pipe_keeps_its_queue(self):
+        collected = []
+        runtime = self._runtime(collected)
+        
+        tokens = Lexer("frames -> invert ~> grayscale -> blur -> collect").tokenize()
+        runtime.execute(Parser(tokens).parse())
+        
+        names = [node.name for node in runtime.pipeline.nodes]
+        assert names == ["frames_1", "invert_2", "grayscale_3+blur_4", "collect_5"]
+        assert len(collected) == 3
+    
+    def test_timed_node_keeps_its_name(self):
+        collected = []
+        runtime = self._runtime(collected)
+        
+        tokens = Lexer("frames -> invert -> grayscale @ 5 s -> blur -> collect").tokenize()
+        runtime.execute(Parser(tokens).parse())
+        
+        names = [node.name for node in runtime.pipeline.nodes]
+        assert names == ["frames_1", "invert_2", "grayscale_3", "blur_4", "collect_5"]
+        assert set(runtime.timing_info) <= set(names)
+        assert len(collected) == 3
+
+
+class TestDtypeCasts:
+    """Test casts in front of functions that need one frame dtype"""
+    
+    def test_cast_feeds_uint8_only_function(self):
+        runtime = Runtime()
+        collected = []
+        frames = finite_source(2)
+        
+        def float_frames(frame, **kwargs):
+            frame = frames(None)
+            if frame is not None:
+                frame.data = frame.data.astype(np.float32)
+            return frame
+        
+        runtime.registry.register("frames", float_frames, is_source=True)
+        runtime.registry.register("collect", lambda frame, **kwargs: collected.append(frame),
+                                  is_sink=True)
+        
+        pipeline = runtime.compile(Parser(Lexer("frames -> edges -> collect").tokenize()).parse())
+        names = [node.name for node in pipeline.nodes]
+        assert names == ["frames_1", "edges_2", "collect_3"]
+        
+        runtime.execute(Parser(Lexer("frames -> edges -> collect").tokenize()).parse())
+        names = [node.name for node in runtime.pipeline.nodes]
+        assert names == ["frames_1", "edges_2", "collect_3"]
+        assert [f.timestamp for f in collected] == [0.0, 1.0]
+        assert all(f.dtype == np.uint8 for f in collected)
+    
+    def test_cast_target_still_batches_with_its_sibling(self):
+        runtime = Runtime()
+        collected = []
+        runtime.registry.register("frames", finite_source(40), is_source=True)
+        runtime.registry.register("collect", lambda frame, **kwargs: collected.append(frame),
+                                  is_sink=True)
+        
+        runtime.execute(Parser(Lexer("frames -> (edges &> blur) -> collect").tokenize()).parse())
+        assert runtime.pipeline.wait(5.0)
+        names = [node.name for node in runtime.pipeline.nodes]
+        assert names == ["frames_1", "edges_2&blur_3", "collect_4"]
+        assert len(collected) == 80
+    
+    def test_cast_frame_saturates_and_passes_matching_frames(self):
+        data = np.array([[[-3.0, 12.6, 300.0]]], dtype=np.float32)
+        frame = Frame(data=data, format=FrameFormat.BGR, width=1, height=1, timestamp=0.0)
+        
+        cast = cast_frame(frame, np.uint8)
+        assert cast.dtype == np.uint8
+        assert cast.data.tolist() == [[[0, 13, 255]]]
+        assert cast_frame(cast, np.uint8) is cast
+    
+    def test_build_matches_add_node_and_connect(self):
+        def make():
+            nodes = [PipelineNode(name, lambda frame, **kwargs: frame) for name in "abcd"]
+            nodes[1].accepts_dtype = nodes[3].accepts_dtype = np.uint8
+            edges = [(nodes[0], nodes[1], 10, False), (nodes[1], nodes[2], 4, True),
+                     (nodes[2], nodes[3], 10, False), (nodes[0], nodes[3], 10, False)]
+            return nodes, edges
+        
+        def shape(pipeline):
+            return ([n.name for n in pipeline.nodes],
+                    [(a.name, b.name, q.maxsize, q in pipeline.async_queues)
+                     for a, b, q in pipeline.connections])
+        
+        eager = Pipeline()
+        nodes, edges = make()
+        for node in nodes:
+            eager.add_node(node)
+        for edge in edges:
+            eager.connect(*edge)
+        
+        built = Pipeline()
+        built.build(*make())
+        assert shape(built) == shape(eager)
+        assert shape(built)[0] == ["a", "b", "c", "d"]
+
+
+class TestAsyncioScheduler:
+    """Test running a pipeline's nodes as coroutines on one event loop"""
+    
+    def _run(self, code, scheduler):
+        runtime = Runtime(scheduler=scheduler)
+        collected = []
+        runtime.registry.register("frames", finite_source(4), is_source=True)
+        runtime.registry.register("collect", lambda frame, **kwargs: collected.append(frame),
+                                  is_sink=True)
+        runtime.execute(Parser(Lexer(code).tokenize()).parse())
+        return runtime.pipeline, collected
+    
+    @pytest.mark.parametrize("code", [
+        "frames -> invert ~> grayscale -> collect",
+        "frames -> (invert &> grayscale) -> collect",
+    ])
+    def test_matches_threaded_scheduler(self, code):
+        pipeline, collected = self._run(code, "asyncio")
+        _, expected = self._run(code, "threads")
+        
+        assert all(node.thread is None for node in pipeline.nodes)
+        assert not pipeline.is_alive()
+        assert [f.timestamp for f in collected] == [f.timestamp for f in expected]
+        for got, want in zip(collected, expected):
+            assert np.array_equal(got.data, want.data)
+    
+    def test_unknown_scheduler_is_rejected(self):
+        with pytest.raises(ValueError):
+            Runtime(scheduler="fibers").compile(Parser(Lexer("test-pattern -> display").tokenize()).parse())
+
+
+class TestRuntimeBranchBatching:
+    """Test concurrent batching of sibling parallel branches"""
+    
+    def test_sibling_branches_become_one_batch_node(self):
+        runtime = Runtime()
+        tokens = Lexer("test-pattern -> (grayscale &> invert) -> display").tokenize()
+        pipeline = runtime.compile(Parser(tokens).parse())
+        
+        names = [node.name for node in pipeline.nodes]
+        assert names == ["test-pattern_1", "grayscale_2&invert_3", "display_4"]
+        assert len(pipeline.connections) == 2
+        assert pipeline.nodes[2].input_queue is pipeline.nodes[1].output_queues[0]
+    
+    def test_batched_branches_emit_every_result_in_order(self):
+        runtime = Runtime()
+        collected = []
+        runtime.registry.register("frames", finite_source(4), is_source=True)
+        runtime.registry.register("collect", lambda frame, **kwargs: collected.append(frame),
+                                  is_sink=True)
+        
+        tokens = Lexer("frames -> (invert &> grayscale) -> collect").tokenize()
+        runtime.execute(Parser(tokens).parse())
+        
+        assert [f.timestamp for f in collected] == [0.0, 0.0, 1.0, 1.0, 2.0, 2.0, 3.0, 3.0]
+        assert [f.format for f in collected[:2]] == [FrameFormat.BGR, FrameFormat.GRAY]
+        assert collected[0].data[0, 0].tolist() == [255, 155, 55]
+
+
+class TestPipelineQueue:
+    """Test the inter-stage frame queue"""
+    
+    def test_bounded_queue_applies_backpressure(self):
+        queue = Queue(maxsize=2)
+        queue.put(1)
+        queue.put(2)
+        
+        with pytest.raises(TimeoutError):
+            queue.put(3, timeout=0.01)
+        assert queue.get() == 1
+        queue.put(3, timeout=0.01)
+        assert queue.qsize() == 2
+    
+    def test_closed_queue_drains_then_ends(self):
+        queue = Queue()
+        queue.put(1)
+        queue.close()
+        
+        assert queue.qsize() == 1
+        assert queue.get() == 1
+        assert queue.get() is None
+        assert queue.get() is None
+        with pytest.raises(RuntimeError):
+            queue.put(2)
+    
+    def test_get_times_out_on_empty_queue(self):
+        with pytest.raises(TimeoutError):
+            Queue(maxsize=1).get(timeout=0.01)
+    
+    def test_close_wakes_blocked_producers(self):
+        queue = Queue(maxsize=1)
+        queue.put(1)
+        errors = []
+        
+        def put(item):
+            try:
+                queue.put(item)
+            except RuntimeError as error:
+                errors.append(error)
+        
+        blocked = [threading.Thread(target=put, args=(item,)) for item in (2, 3)]
+        for thread in blocked:
+            thread.start()
+        
+        queue.close()
+        for thread in blocked:
+            thread.join(timeout=1.0)
+        assert not any(thread.is_alive() for thread in blocked)
+        assert len(errors) == 2
+        assert queue.get() == 1
+        assert queue.get() is None
+    
+    def test_put_racing_close_is_never_dropped(self):
+        for _ in range(200):
+            queue = Queue()
+            outcome = []
+            
+            def put():
+                try:
+                    queue.put(1)
+                    outcome.append("put")
+                except RuntimeError:
+                    outcome.append("closed")
+            
+            producer = threading.Thread(target=put)
+            producer.start()
+            queue.close()
+            producer.join(timeout=1.0)
+            
+            delivered = []
+            while (item := queue.get(timeout=1.0)) is not None:
+                delivered.append(item)
+            assert delivered == ([1] if outcome == ["put"] else [])
+    
+    def test_done_event_set_when_last_node_finishes(self):
+        runtime = Runtime()
+        runtime.registry.register("frames", finite_source(3), is_source=True)
+        pipeline = runtime.compile(Parser(Lexer("frames -> invert -> blur").tokenize()).parse())
+        
+        pipeline.start()
+        assert pipeline.done_event.wait(timeout=5.0)
+        pipeline.wait()
+        assert not pipeline.is_alive()
+    
+    def test_wait_with_timeout_reports_completion(self):
+        pipeline = Pipeline()
+        node = PipelineNode("invert", lambda frame, **kwargs: frame)
+        node.set_input(Queue())
+        pipeline.add_node(node)
+        pipeline.start()
+        
+        assert pipeline.wait(timeout=0.01) is False
+        node.input_queue.close()
+        assert pipeline.wait(timeout=5.0) is True
+        assert not pipeline.is_alive()
+    
+    def test_stop_wakes_idle_nodes_immediately(self):
+        pipeline = Pipeline()
+        transform = PipelineNode("invert", lambda frame, **kwargs: frame)
+        transform.set_input(Queue())
+        sink = PipelineNode("sink", lambda frame, **kwargs: None)
+        sink.is_sink = True
+        pipeline.add_node(transform)
+        pipeline.add_node(sink)
+        pipeline.connect(transform, sink)
+        pipeline.start()
+        
+        started = time.perf_counter()
+        pipeline.stop()
+        assert not pipeline.is_alive()
+        assert time.perf_counter() - started < 1.0
+
+
+class TestFrameSharing:
+    """Test copy-on-write sharing of frames on fan-out"""
+    
+    def test_fan_out_shares_one_read_only_buffer(self):
+        node = PipelineNode("split", lambda frame, **kwargs: frame)
+        queues = [Queue(), Queue()]
+        for queue in queues:
+            node.add_output(queue)
+        
+        frame = finite_source(1)(None)
+        node.emit(frame)
+        first, second = queues[0].get(), queues[1].get()
+        
+        assert first is not second
+        assert first.data is second.data is frame.data
+        assert not first.data.flags.writeable
+        assert first.metadata is not second.metadata
+    
+    def test_cow_mutate_copies_only_shared_buffers(self):
+        frame = finite_source(1)(None)
+        data = frame.data
+        assert frame.cow_mutate() is data
+        
+        shared = frame.share()
+        private = shared.cow_mutate()
+        private[:] = 0
+        
+        assert private is shared.data
+        assert private is not data
+        assert data[0, 0].tolist() == [0, 100, 200]
@@ -70,7 +70,7 @@ def run_cli(args):
             
             # Wait for completion or user interrupt
             try:
-                pipeline.wait_for_completion()
+                pipeline.wait()
             except KeyboardInterrupt:
                 print("\nStopping pipeline...")
                 pipeline.stop()
@@ -3,9 +3,15 @@ Built-in video processing functions for VidPipe
 """
 
 import numpy as np
+from functools import lru_cache
 from typing import Optional, Dict, Any, Callable
 from dataclasses import dataclass, field
-from .pipeline import Frame, FrameFormat
+from .pipeline import Frame, FrameFormat, FRAME_POOL
+import atexit
+import csv
+import json
+import os
+import sys
 import time
 import threading
 from queue import Queue
@@ -18,6 +24,46 @@ except ImportError as exc:  # pragma: no cover - exercised only on headless syst
 else:  # pragma: no cover - exercised when OpenCV is available
     _CV2_IMPORT_ERROR = None
 
+try:
+    from numba import njit, prange  # type: ignore
+except ImportError:  # pragma: no cover - numba is an optional accelerator
+    njit = None  # type: ignore
+    prange = range
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - orjson is an optional accelerator
+    orjson = None  # type: ignore
+
+try:
+    from numba import cuda as numba_cuda  # type: ignore
+except ImportError:  # pragma: no cover - numba is an optional accelerator
+    numba_cuda = None  # type: ignore
+
+
+def _jit(**options):
+    """Compile a kernel with numba when available, otherwise leave it as Python."""
+    def decorate(func):
+        return njit(**options)(func) if njit is not None else func
+    return decorate
+
+# Shared PCG64 generator for the noise filters and sources
+_rng = np.random.default_rng()
+
+_scratch_local = threading.local()
+
+
+def _scratch(name: str, shape: tuple, dtype=np.uint8) -> np.ndarray:
+    """Per-thread scratch buffer, reallocated only when the shape or dtype changes.
+
+    Only for intermediates: a returned frame must never alias a scratch buffer.
+    """
+    buffers = _scratch_local.__dict__
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape or buf.dtype != dtype:
+        buf = buffers[name] = np.empty(shape, dtype=dtype)
+    return buf
+
 
 def _require_cv2():
     """Ensure OpenCV is available before executing a function that depends on it."""
@@ -27,6 +73,32 @@ def _require_cv2():
         ) from _CV2_IMPORT_ERROR
 
 
+def _cuda_device_available() -> bool:
+    """Whether OpenCV was built with CUDA and can see at least one device."""
+    if cv2 is None or not hasattr(cv2, "cuda"):
+        return False
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except cv2.error:  # pragma: no cover - depends on the OpenCV build
+        return False
+
+
+_CUDA_AVAILABLE = _cuda_device_available()
+
+
+def _numba_cuda_available() -> bool:
+    """Whether numba can launch CUDA kernels; VIDPIPE_CUDA=0 opts out."""
+    if numba_cuda is None or os.environ.get("VIDPIPE_CUDA") == "0":
+        return False
+    try:
+        return numba_cuda.is_available()
+    except Exception:  # pragma: no cover - depends on the driver install
+        return False
+
+
+_NUMBA_CUDA_AVAILABLE = _numba_cuda_available()
+
+
 @dataclass
 class FunctionDef:
     """Definition of a video processing function"""
@@ -36,6 +108,7 @@ class FunctionDef:
     is_sink: bool = False
     description: str = ""
     parameters: Dict[str, str] = field(default_factory=dict)
+    accepts_dtype: Optional[np.dtype] = None
 
 
 class FunctionRegistry:
@@ -47,15 +120,24 @@ class FunctionRegistry:
     
     def register(self, name: str, function: Callable, is_source: bool = False,
                 is_sink: bool = False, description: str = "",
-                parameters: Optional[Dict[str, str]] = None):
-        """Register a function"""
+                parameters: Optional[Dict[str, str]] = None,
+                accepts_dtype: Optional[np.dtype] = None):
+        """Register a function.
+        
+        ``accepts_dtype`` declares the only frame dtype the function handles;
+        pipeline nodes cast other frames to it before calling the function.
+        """
+        # The lexer interns identifiers, so lookups by token value then hit
+        # the key by identity; hyphenated names are not interned otherwise
+        name = sys.intern(name)
         self.functions[name] = FunctionDef(
             name=name,
             function=function,
             is_source=is_source,
             is_sink=is_sink,
             description=description,
-            parameters=parameters or {}
+            parameters=parameters or {},
+            accepts_dtype=accepts_dtype
         )
     
     def get_function(self, name: str) -> Optional[FunctionDef]:
@@ -124,7 +206,8 @@ class FunctionRegistry:
             parameters={
                 "low_threshold": "Low threshold for Canny (default: 50)",
                 "high_threshold": "High threshold for Canny (default: 150)"
-            }
+            },
+            accepts_dtype=np.uint8
         )
         self.register(
             "threshold",
@@ -202,7 +285,8 @@ class FunctionRegistry:
             parameters={"gamma": "Gamma correction value (0.1 to 3.0, default: 1.0)"}
         )
         self.register("histogram-eq", histogram_equalization_filter,
-                     description="Apply histogram equalization")
+                     description="Apply histogram equalization",
+                     accepts_dtype=np.uint8)
         self.register(
             "morphology",
             morphology_filter,
@@ -216,7 +300,8 @@ class FunctionRegistry:
             "contours",
             contours_filter,
             description="Find and draw contours",
-            parameters={"min_area": "Minimum contour area (default: 100)"}
+            parameters={"min_area": "Minimum contour area (default: 100)"},
+            accepts_dtype=np.uint8
         )
         self.register(
             "corners",
@@ -500,7 +585,8 @@ class FunctionRegistry:
         
         # Additional processing functions
         self.register("invert", invert_filter,
-                     description="Invert colors")
+                     description="Invert colors",
+                     parameters={"inplace": "Overwrite the input frame when it is not shared (default: False)"})
         self.register("sepia", sepia_filter,
                      description="Apply sepia tone effect")
         self.register("black-white", black_white_filter,
@@ -509,7 +595,8 @@ class FunctionRegistry:
         self.register("vintage", vintage_filter,
                      description="Apply vintage effect")
         self.register("cartoon", cartoon_filter,
-                     description="Apply cartoon effect")
+                     description="Apply cartoon effect",
+                     accepts_dtype=np.uint8)
         self.register("sketch", sketch_filter,
                      description="Convert to pencil sketch")
         self.register("thermal", thermal_filter,
@@ -608,7 +695,8 @@ class FunctionRegistry:
                      description="Remove atmospheric haze")
         self.register("denoise", denoise_filter,
                      description="Reduce noise",
-                     parameters={"strength": "Denoising strength (default: 10)"})
+                     parameters={"strength": "Denoising strength (default: 10)"},
+                     accepts_dtype=np.uint8)
         self.register("unsharp-mask", unsharp_mask_filter,
                      description="Apply unsharp mask sharpening",
                      parameters={
@@ -782,12 +870,12 @@ def test_pattern_source(frame: Optional[Frame], width: int = 640, height: int =
 def grayscale_filter(frame: Frame, **kwargs) -> Frame:
     """Convert frame to grayscale"""
     _require_cv2()
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         return frame
     
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
-    elif frame.format == FrameFormat.RGB:
+    elif frame.format is FrameFormat.RGB:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_RGB2GRAY)
     else:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_RGBA2GRAY)
@@ -824,10 +912,10 @@ def edge_filter(frame: Frame, low_threshold: int = 50, high_threshold: int = 150
     """Detect edges using Canny edge detection"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
-        if frame.format == FrameFormat.BGR:
+    if frame.format is not FrameFormat.GRAY:
+        if frame.format is FrameFormat.BGR:
             gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
-        elif frame.format == FrameFormat.RGB:
+        elif frame.format is FrameFormat.RGB:
             gray_data = cv2.cvtColor(frame.data, cv2.COLOR_RGB2GRAY)
         else:
             gray_data = cv2.cvtColor(frame.data, cv2.COLOR_RGBA2GRAY)
@@ -850,7 +938,7 @@ def threshold_filter(frame: Frame, threshold: int = 127, max_val: int = 255, **k
     """Apply binary threshold"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_frame = grayscale_filter(frame)
         gray_data = gray_frame.data
     else:
@@ -964,7 +1052,7 @@ class DisplayManager:
 
                 # Convert frame data to ensure it's in the right format
                 display_data = frame.data.copy()
-                if frame.format == FrameFormat.GRAY:
+                if frame.format is FrameFormat.GRAY:
                     display_data = cv2.cvtColor(display_data, cv2.COLOR_GRAY2BGR)
 
                 cv2.imshow(window_name, display_data)
@@ -1128,11 +1216,11 @@ def contrast_filter(frame: Frame, contrast: float = 0, **kwargs) -> Frame:
 def hue_filter(frame: Frame, hue: float = 0, **kwargs) -> Frame:
     """Adjust frame hue"""
     _require_cv2()
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         return frame  # Hue adjustment not applicable to grayscale
     
     # Convert to HSV
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         hsv_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2HSV)
     else:
         hsv_data = cv2.cvtColor(frame.data, cv2.COLOR_RGB2HSV)
@@ -1141,7 +1229,7 @@ def hue_filter(frame: Frame, hue: float = 0, **kwargs) -> Frame:
     hsv_data[:, :, 0] = (hsv_data[:, :, 0] + hue) % 180
     
     # Convert back to original format
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         adjusted_data = cv2.cvtColor(hsv_data, cv2.COLOR_HSV2BGR)
     else:
         adjusted_data = cv2.cvtColor(hsv_data, cv2.COLOR_HSV2RGB)
@@ -1159,11 +1247,11 @@ def hue_filter(frame: Frame, hue: float = 0, **kwargs) -> Frame:
 def saturation_filter(frame: Frame, saturation: float = 0, **kwargs) -> Frame:
     """Adjust frame saturation"""
     _require_cv2()
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         return frame  # Saturation adjustment not applicable to grayscale
     
     # Convert to HSV
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         hsv_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2HSV)
     else:
         hsv_data = cv2.cvtColor(frame.data, cv2.COLOR_RGB2HSV)
@@ -1172,7 +1260,7 @@ def saturation_filter(frame: Frame, saturation: float = 0, **kwargs) -> Frame:
     hsv_data[:, :, 1] = np.clip(hsv_data[:, :, 1] * (1 + saturation / 100.0), 0, 255)
     
     # Convert back to original format
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         adjusted_data = cv2.cvtColor(hsv_data, cv2.COLOR_HSV2BGR)
     else:
         adjusted_data = cv2.cvtColor(hsv_data, cv2.COLOR_HSV2RGB)
@@ -1213,12 +1301,12 @@ def gamma_filter(frame: Frame, gamma: float = 1.0, **kwargs) -> Frame:
 def histogram_equalization_filter(frame: Frame, **kwargs) -> Frame:
     """Apply histogram equalization"""
     _require_cv2()
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         # Grayscale histogram equalization
         equalized_data = cv2.equalizeHist(frame.data)
     else:
         # Color histogram equalization
-        if frame.format == FrameFormat.BGR:
+        if frame.format is FrameFormat.BGR:
             # Convert to YUV and equalize Y channel
             yuv_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2YUV)
             yuv_data[:, :, 0] = cv2.equalizeHist(yuv_data[:, :, 0])
@@ -1243,7 +1331,7 @@ def morphology_filter(frame: Frame, operation: str = "open", kernel_size: int =
     """Apply morphological operations"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_frame = grayscale_filter(frame)
         gray_data = gray_frame.data
     else:
@@ -1278,7 +1366,7 @@ def contours_filter(frame: Frame, min_area: int = 100, **kwargs) -> Frame:
     """Find and draw contours"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_frame = grayscale_filter(frame)
         gray_data = gray_frame.data
     else:
@@ -1288,7 +1376,7 @@ def contours_filter(frame: Frame, min_area: int = 100, **kwargs) -> Frame:
     contours, _ = cv2.findContours(gray_data, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
     # Create output frame
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         output_data = np.zeros_like(gray_data)
     else:
         output_data = np.zeros_like(frame.data)
@@ -1296,7 +1384,7 @@ def contours_filter(frame: Frame, min_area: int = 100, **kwargs) -> Frame:
     # Draw contours
     for contour in contours:
         if cv2.contourArea(contour) >= min_area:
-            if frame.format == FrameFormat.GRAY:
+            if frame.format is FrameFormat.GRAY:
                 cv2.drawContours(output_data, [contour], -1, 255, 2)
             else:
                 cv2.drawContours(output_data, [contour], -1, (0, 255, 0), 2)
@@ -1315,7 +1403,7 @@ def corners_filter(frame: Frame, max_corners: int = 100, quality: float = 0.01,
     """Detect corners using Harris corner detection"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_frame = grayscale_filter(frame)
         gray_data = gray_frame.data
     else:
@@ -1326,7 +1414,7 @@ def corners_filter(frame: Frame, max_corners: int = 100, quality: float = 0.01,
                                      qualityLevel=quality, minDistance=min_distance)
     
     # Create output frame
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
     else:
         output_data = frame.data.copy()
@@ -1351,7 +1439,7 @@ def optical_flow_filter(frame: Frame, **kwargs) -> Frame:
     """Visualize dense optical flow using the Farneback algorithm."""
     _require_cv2()
     # Convert input to grayscale
-    gray = grayscale_filter(frame).data if frame.format != FrameFormat.GRAY else frame.data
+    gray = grayscale_filter(frame).data if frame.format is not FrameFormat.GRAY else frame.data
 
     # Initialize previous frame storage on first call
     if not hasattr(optical_flow_filter, "_prev"):
@@ -1479,7 +1567,7 @@ def laplacian_filter(frame: Frame, **kwargs) -> Frame:
     """Apply Laplacian edge detection"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -1501,7 +1589,7 @@ def sobel_x_filter(frame: Frame, **kwargs) -> Frame:
     """Apply Sobel X gradient"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -1523,7 +1611,7 @@ def sobel_y_filter(frame: Frame, **kwargs) -> Frame:
     """Apply Sobel Y gradient"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -1545,7 +1633,7 @@ def scharr_x_filter(frame: Frame, **kwargs) -> Frame:
     """Apply Scharr X gradient"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -1567,7 +1655,7 @@ def scharr_y_filter(frame: Frame, **kwargs) -> Frame:
     """Apply Scharr Y gradient"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -1589,7 +1677,7 @@ def scharr_y_filter(frame: Frame, **kwargs) -> Frame:
 def bgr2rgb_filter(frame: Frame, **kwargs) -> Frame:
     """Convert BGR to RGB"""
     _require_cv2()
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         rgb_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2RGB)
         return Frame(
             data=rgb_data,
@@ -1605,7 +1693,7 @@ def bgr2rgb_filter(frame: Frame, **kwargs) -> Frame:
 def rgb2bgr_filter(frame: Frame, **kwargs) -> Frame:
     """Convert RGB to BGR"""
     _require_cv2()
-    if frame.format == FrameFormat.RGB:
+    if frame.format is FrameFormat.RGB:
         bgr_data = cv2.cvtColor(frame.data, cv2.COLOR_RGB2BGR)
         return Frame(
             data=bgr_data,
@@ -1621,7 +1709,7 @@ def rgb2bgr_filter(frame: Frame, **kwargs) -> Frame:
 def bgr2hsv_filter(frame: Frame, **kwargs) -> Frame:
     """Convert BGR to HSV"""
     _require_cv2()
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         hsv_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2HSV)
         return Frame(
             data=hsv_data,
@@ -1651,7 +1739,7 @@ def hsv2bgr_filter(frame: Frame, **kwargs) -> Frame:
 def bgr2lab_filter(frame: Frame, **kwargs) -> Frame:
     """Convert BGR to LAB"""
     _require_cv2()
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         lab_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2LAB)
         return Frame(
             data=lab_data,
@@ -1681,7 +1769,7 @@ def lab2bgr_filter(frame: Frame, **kwargs) -> Frame:
 def bgr2yuv_filter(frame: Frame, **kwargs) -> Frame:
     """Convert BGR to YUV"""
     _require_cv2()
-    if frame.format == FrameFormat.BGR:
+    if frame.format is FrameFormat.BGR:
         yuv_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2YUV)
         return Frame(
             data=yuv_data,
@@ -1709,12 +1797,47 @@ def yuv2bgr_filter(frame: Frame, **kwargs) -> Frame:
 
 
 # Geometric transformations
+@lru_cache(maxsize=64)
+def _translation_matrix(x: float, y: float) -> np.ndarray:
+    """2x3 translation matrix, built once per offset"""
+    M = np.float32([[1, 0, x], [0, 1, y]])
+    M.flags.writeable = False
+    return M
+
+
+@lru_cache(maxsize=64)
+def _shear_matrix(shear_x: float, shear_y: float) -> np.ndarray:
+    """2x3 shear matrix, built once per shear pair"""
+    M = np.float32([[1, shear_x, 0], [shear_y, 1, 0]])
+    M.flags.writeable = False
+    return M
+
+
+@lru_cache(maxsize=16)
+def _default_perspective_matrix(cols: int, rows: int) -> np.ndarray:
+    """Default slight-perspective matrix for a frame size"""
+    pts1 = np.float32([[0, 0], [cols, 0], [0, rows], [cols, rows]])
+    pts2 = np.float32([[0, 0], [cols, 0], [cols*0.1, rows], [cols*0.9, rows]])
+    M = cv2.getPerspectiveTransform(pts1, pts2)
+    M.flags.writeable = False
+    return M
+
+
+@lru_cache(maxsize=16)
+def _default_affine_matrix(cols: int, rows: int) -> np.ndarray:
+    """Default slight rotation-and-scale matrix for a frame size"""
+    pts1 = np.float32([[0, 0], [cols, 0], [0, rows]])
+    pts2 = np.float32([[cols*0.1, rows*0.1], [cols*0.9, rows*0.1], [cols*0.1, rows*0.9]])
+    M = cv2.getAffineTransform(pts1, pts2)
+    M.flags.writeable = False
+    return M
+
+
 def translate_filter(frame: Frame, x: float = 0, y: float = 0, **kwargs) -> Frame:
     """Translate (move) image"""
     _require_cv2()
     rows, cols = frame.height, frame.width
-    M = np.float32([[1, 0, x], [0, 1, y]])
-    translated_data = cv2.warpAffine(frame.data, M, (cols, rows))
+    translated_data = cv2.warpAffine(frame.data, _translation_matrix(x, y), (cols, rows))
     
     return Frame(
         data=translated_data,
@@ -1745,8 +1868,7 @@ def shear_filter(frame: Frame, shear_x: float = 0, shear_y: float = 0, **kwargs)
     """Apply shear transformation"""
     _require_cv2()
     rows, cols = frame.height, frame.width
-    M = np.float32([[1, shear_x, 0], [shear_y, 1, 0]])
-    sheared_data = cv2.warpAffine(frame.data, M, (cols, rows))
+    sheared_data = cv2.warpAffine(frame.data, _shear_matrix(shear_x, shear_y), (cols, rows))
     
     return Frame(
         data=sheared_data,
@@ -1763,10 +1885,7 @@ def perspective_filter(frame: Frame, matrix: Optional[np.ndarray] = None, **kwar
     _require_cv2()
     if matrix is None:
         # Default perspective transformation (slight perspective effect)
-        rows, cols = frame.height, frame.width
-        pts1 = np.float32([[0, 0], [cols, 0], [0, rows], [cols, rows]])
-        pts2 = np.float32([[0, 0], [cols, 0], [cols*0.1, rows], [cols*0.9, rows]])
-        matrix = cv2.getPerspectiveTransform(pts1, pts2)
+        matrix = _default_perspective_matrix(frame.width, frame.height)
     
     transformed_data = cv2.warpPerspective(frame.data, matrix, (frame.width, frame.height))
     
@@ -1785,10 +1904,7 @@ def affine_filter(frame: Frame, matrix: Optional[np.ndarray] = None, **kwargs) -
     _require_cv2()
     if matrix is None:
         # Default affine transformation (slight rotation and scaling)
-        rows, cols = frame.height, frame.width
-        pts1 = np.float32([[0, 0], [cols, 0], [0, rows]])
-        pts2 = np.float32([[cols*0.1, rows*0.1], [cols*0.9, rows*0.1], [cols*0.1, rows*0.9]])
-        matrix = cv2.getAffineTransform(pts1, pts2)
+        matrix = _default_affine_matrix(frame.width, frame.height)
     
     transformed_data = cv2.warpAffine(frame.data, matrix, (frame.width, frame.height))
     
@@ -1806,7 +1922,8 @@ def affine_filter(frame: Frame, matrix: Optional[np.ndarray] = None, **kwargs) -
 def add_filter(frame: Frame, value: float = 10, **kwargs) -> Frame:
     """Add constant value to all pixels"""
     _require_cv2()
-    added_data = cv2.add(frame.data, np.full_like(frame.data, value, dtype=np.uint8))
+    # A per-channel scalar saturates in one pass without a constant frame
+    added_data = cv2.add(frame.data, (value,) * 4)
     
     return Frame(
         data=added_data,
@@ -1821,7 +1938,7 @@ def add_filter(frame: Frame, value: float = 10, **kwargs) -> Frame:
 def subtract_filter(frame: Frame, value: float = 10, **kwargs) -> Frame:
     """Subtract constant value from all pixels"""
     _require_cv2()
-    subtracted_data = cv2.subtract(frame.data, np.full_like(frame.data, value, dtype=np.uint8))
+    subtracted_data = cv2.subtract(frame.data, (value,) * 4)
     
     return Frame(
         data=subtracted_data,
@@ -1835,7 +1952,10 @@ def subtract_filter(frame: Frame, value: float = 10, **kwargs) -> Frame:
 
 def multiply_filter(frame: Frame, value: float = 1.1, **kwargs) -> Frame:
     """Multiply all pixels by constant"""
-    multiplied_data = np.clip(frame.data.astype(np.float32) * value, 0, 255).astype(np.uint8)
+    _require_cv2()
+    # Negative factors clip every pixel to zero, same as a zero factor.
+    # convertScaleAbs rounds to nearest, where a float32 cast would truncate.
+    multiplied_data = cv2.convertScaleAbs(frame.data, alpha=max(value, 0.0), beta=0)
     
     return Frame(
         data=multiplied_data,
@@ -1849,9 +1969,11 @@ def multiply_filter(frame: Frame, value: float = 1.1, **kwargs) -> Frame:
 
 def divide_filter(frame: Frame, value: float = 1.1, **kwargs) -> Frame:
     """Divide all pixels by constant"""
+    _require_cv2()
     if value == 0:
         value = 1  # Prevent division by zero
-    divided_data = np.clip(frame.data.astype(np.float32) / value, 0, 255).astype(np.uint8)
+    # Rounds to nearest, like multiply_filter
+    divided_data = cv2.convertScaleAbs(frame.data, alpha=max(1.0 / value, 0.0), beta=0)
     
     return Frame(
         data=divided_data,
@@ -1865,7 +1987,13 @@ def divide_filter(frame: Frame, value: float = 1.1, **kwargs) -> Frame:
 
 def abs_filter(frame: Frame, **kwargs) -> Frame:
     """Take absolute value of all pixels"""
-    abs_data = np.abs(frame.data.astype(np.int16)).astype(np.uint8)
+    _require_cv2()
+    if np.issubdtype(frame.data.dtype, np.unsignedinteger):
+        # |x| == x for unsigned data; absdiff against zero is a single SIMD pass
+        abs_data = cv2.absdiff(frame.data, 0.0)
+    else:
+        # Signed output of a diff filter: saturating |x| straight to uint8
+        abs_data = cv2.convertScaleAbs(frame.data)
     
     return Frame(
         data=abs_data,
@@ -1877,9 +2005,48 @@ def abs_filter(frame: Frame, **kwargs) -> Frame:
     )
 
 
+def _pointwise_values(kind: str, x: np.ndarray, param: float = 0.0) -> np.ndarray:
+    """Evaluate a pointwise mapping on float32 pixel values in 0..255"""
+    if kind == "pow":
+        return (x / 255.0) ** param * 255
+    if kind == "sqrt":
+        return np.sqrt(x / 255.0) * 255
+    if kind == "log":
+        return np.log(x + 1) * 255 / np.log(256)  # Add 1 to avoid log(0)
+    if kind == "exp":
+        return np.exp(x / 255.0) / np.e * 255
+    if kind == "scale":
+        return x * param
+    raise ValueError(f"Unknown lookup table: {kind}")
+
+
+@lru_cache(maxsize=32)
+def _u8_table(kind: str, param: float = 0.0) -> np.ndarray:
+    """256-entry lookup table for a pointwise uint8 mapping, evaluated once per parameter"""
+    values = _pointwise_values(kind, np.arange(256, dtype=np.float32), param)
+    table = np.clip(values, 0, 255).astype(np.uint8)
+    table.flags.writeable = False
+    return table
+
+
+def _lookup_u8(data: np.ndarray, kind: str, param: float = 0.0) -> np.ndarray:
+    """Map every pixel through a pointwise mapping into uint8.
+    
+    8-bit frames go through a cached 256-entry table in a single pass;
+    other dtypes, which a table cannot index, evaluate the formula in float32.
+    """
+    if data.dtype != np.uint8:
+        values = _pointwise_values(kind, data.astype(np.float32), param)
+        return np.clip(values, 0, 255).astype(np.uint8)
+    table = _u8_table(kind, param)
+    if cv2 is not None:
+        return cv2.LUT(data, table)
+    return table[data]
+
+
 def square_filter(frame: Frame, **kwargs) -> Frame:
     """Square all pixel values"""
-    squared_data = np.clip((frame.data.astype(np.float32) / 255.0) ** 2 * 255, 0, 255).astype(np.uint8)
+    squared_data = _lookup_u8(frame.data, "pow", 2.0)
     
     return Frame(
         data=squared_data,
@@ -1893,7 +2060,7 @@ def square_filter(frame: Frame, **kwargs) -> Frame:
 
 def sqrt_filter(frame: Frame, **kwargs) -> Frame:
     """Take square root of all pixel values"""
-    sqrt_data = np.clip(np.sqrt(frame.data.astype(np.float32) / 255.0) * 255, 0, 255).astype(np.uint8)
+    sqrt_data = _lookup_u8(frame.data, "sqrt")
     
     return Frame(
         data=sqrt_data,
@@ -1907,8 +2074,7 @@ def sqrt_filter(frame: Frame, **kwargs) -> Frame:
 
 def log_filter(frame: Frame, **kwargs) -> Frame:
     """Take logarithm of all pixel values"""
-    # Add 1 to avoid log(0)
-    log_data = np.clip(np.log(frame.data.astype(np.float32) + 1) * 255 / np.log(256), 0, 255).astype(np.uint8)
+    log_data = _lookup_u8(frame.data, "log")
     
     return Frame(
         data=log_data,
@@ -1922,7 +2088,7 @@ def log_filter(frame: Frame, **kwargs) -> Frame:
 
 def exp_filter(frame: Frame, **kwargs) -> Frame:
     """Take exponential of all pixel values"""
-    exp_data = np.clip(np.exp(frame.data.astype(np.float32) / 255.0) / np.e * 255, 0, 255).astype(np.uint8)
+    exp_data = _lookup_u8(frame.data, "exp")
     
     return Frame(
         data=exp_data,
@@ -1936,7 +2102,7 @@ def exp_filter(frame: Frame, **kwargs) -> Frame:
 
 def power_filter(frame: Frame, power: float = 2, **kwargs) -> Frame:
     """Raise all pixels to power"""
-    power_data = np.clip((frame.data.astype(np.float32) / 255.0) ** power * 255, 0, 255).astype(np.uint8)
+    power_data = _lookup_u8(frame.data, "pow", float(power))
     
     return Frame(
         data=power_data,
@@ -1949,11 +2115,18 @@ def power_filter(frame: Frame, power: float = 2, **kwargs) -> Frame:
 
 
 # Statistical operations
+@lru_cache(maxsize=32)
+def _rect_strel(kernel_size: int) -> np.ndarray:
+    """Rectangular structuring element, built once per size and shared read-only"""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
+    kernel.flags.writeable = False
+    return kernel
+
+
 def mean_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
     """Apply mean filter"""
     _require_cv2()
-    kernel = np.ones((kernel_size, kernel_size), np.float32) / (kernel_size * kernel_size)
-    filtered_data = cv2.filter2D(frame.data, -1, kernel)
+    filtered_data = cv2.boxFilter(frame.data, -1, (kernel_size, kernel_size), normalize=True)
     
     return Frame(
         data=filtered_data,
@@ -1968,8 +2141,7 @@ def mean_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
 def min_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
     """Apply minimum filter"""
     _require_cv2()
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
-    filtered_data = cv2.erode(frame.data, kernel)
+    filtered_data = cv2.erode(frame.data, _rect_strel(kernel_size))
     
     return Frame(
         data=filtered_data,
@@ -1984,8 +2156,7 @@ def min_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
 def max_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
     """Apply maximum filter"""
     _require_cv2()
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_size, kernel_size))
-    filtered_data = cv2.dilate(frame.data, kernel)
+    filtered_data = cv2.dilate(frame.data, _rect_strel(kernel_size))
     
     return Frame(
         data=filtered_data,
@@ -1997,21 +2168,68 @@ def max_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
     )
 
 
+def _local_var(gray: np.ndarray, kernel_size: int) -> np.ndarray:
+    """Local variance E[x^2] - E[x]^2 of a float32 image over a square box"""
+    ksize = (kernel_size, kernel_size)
+    mean = cv2.boxFilter(gray, -1, ksize, normalize=True)
+    sqr_mean = cv2.boxFilter(cv2.multiply(gray, gray), -1, ksize, normalize=True)
+    variance = cv2.subtract(sqr_mean, cv2.multiply(mean, mean))
+    # Rounding can leave tiny negative values in flat regions
+    return cv2.max(variance, 0.0, dst=variance)
+
+
+def _gray_plane(frame: Frame) -> np.ndarray:
+    """The frame's grayscale plane, converting from BGR when needed"""
+    if frame.format is not FrameFormat.GRAY:
+        return cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
+    return frame.data
+
+
+def _local_var_gray(frame: Frame, kernel_size: int) -> np.ndarray:
+    """Local variance of the frame's grayscale plane"""
+    return _local_var(_gray_plane(frame).astype(np.float32), kernel_size)
+
+
+@_jit(parallel=True, cache=True, boundscheck=False)
+def _box_stat_kernel(ii: np.ndarray, ii2: np.ndarray, k: int, take_sqrt: bool, out: np.ndarray):
+    """Per-pixel box variance (or std) from integral images, saturated to uint8"""
+    h, w = out.shape
+    inv = 1.0 / (k * k)
+    for r in prange(h):
+        for c in range(w):
+            s = ii[r + k, c + k] - ii[r, c + k] - ii[r + k, c] + ii[r, c]
+            s2 = ii2[r + k, c + k] - ii2[r, c + k] - ii2[r + k, c] + ii2[r, c]
+            m = s * inv
+            v = max(s2 * inv - m * m, 0.0)
+            if take_sqrt:
+                v = np.sqrt(v)
+            out[r, c] = min(v, 255.0)
+
+
+def _box_stat_u8(frame: Frame, kernel_size: int, take_sqrt: bool) -> np.ndarray:
+    """Local variance or std of the grayscale plane in one fused pass.
+    
+    Integral images make each window O(1) regardless of kernel size; the
+    reflected padding matches boxFilter's default border.
+    """
+    gray = _gray_plane(frame)
+    before = kernel_size // 2
+    after = kernel_size - 1 - before
+    padded = cv2.copyMakeBorder(gray, before, after, before, after, cv2.BORDER_REFLECT_101)
+    ii, ii2 = cv2.integral2(padded, sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    out = np.empty(gray.shape, dtype=np.uint8)
+    _box_stat_kernel(ii, ii2, kernel_size, take_sqrt, out)
+    return out
+
+
 def variance_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
     """Calculate local variance"""
     _require_cv2()
-    # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
-        gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY).astype(np.float32)
+    if njit is not None:
+        variance_data = _box_stat_u8(frame, kernel_size, False)
     else:
-        gray_data = frame.data.astype(np.float32)
-    
-    # Calculate local mean and variance
-    kernel = np.ones((kernel_size, kernel_size), np.float32) / (kernel_size * kernel_size)
-    mean = cv2.filter2D(gray_data, -1, kernel)
-    sqr_mean = cv2.filter2D(gray_data**2, -1, kernel)
-    variance = sqr_mean - mean**2
-    variance_data = np.clip(variance, 0, 255).astype(np.uint8)
+        variance = _local_var_gray(frame, kernel_size)
+        variance_data = np.clip(variance, 0, 255).astype(np.uint8)
     
     return Frame(
         data=variance_data,
@@ -2025,8 +2243,13 @@ def variance_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
 
 def std_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
     """Calculate local standard deviation"""
-    variance_frame = variance_filter(frame, kernel_size, **kwargs)
-    std_data = np.sqrt(variance_frame.data.astype(np.float32)).astype(np.uint8)
+    _require_cv2()
+    if njit is not None:
+        std_data = _box_stat_u8(frame, kernel_size, True)
+    else:
+        variance = _local_var_gray(frame, kernel_size)
+        std = cv2.sqrt(variance, dst=variance)
+        std_data = np.clip(std, 0, 255).astype(np.uint8)
     
     return Frame(
         data=std_data,
@@ -2039,10 +2262,39 @@ def std_filter(frame: Frame, kernel_size: int = 5, **kwargs) -> Frame:
 
 
 # Noise and distortion
+def _pointwise_u8(kernel: Callable, data: np.ndarray, *args) -> np.ndarray:
+    """Run a fused pointwise kernel over the flattened frame into a fresh uint8 buffer"""
+    out = np.empty(data.shape, dtype=np.uint8)
+    kernel(data.ravel(), out.reshape(-1), *args)
+    return out
+
+
+@_jit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+def _gaussian_noise_u8(src: np.ndarray, dst: np.ndarray, mean: float, std: float):
+    """dst = saturate(src + N(mean, std)), sampled and written in a single pass"""
+    for i in prange(src.size):
+        v = np.float32(src[i]) + np.float32(np.random.standard_normal() * std + mean)
+        dst[i] = min(np.float32(255.0), max(np.float32(0.0), v))
+
+
+@_jit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+def _speckle_u8(src: np.ndarray, dst: np.ndarray, variance: float):
+    """dst = saturate(src * (1 + N(0, 1) * variance)), sampled and written in a single pass"""
+    for i in prange(src.size):
+        v = np.float32(src[i]) * np.float32(1.0 + np.random.standard_normal() * variance)
+        dst[i] = min(np.float32(255.0), max(np.float32(0.0), v))
+
+
 def gaussian_noise_filter(frame: Frame, mean: float = 0, std: float = 25, **kwargs) -> Frame:
     """Add Gaussian noise"""
-    noise = np.random.normal(mean, std, frame.data.shape).astype(np.float32)
-    noisy_data = np.clip(frame.data.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    if njit is not None:
+        noisy_data = _pointwise_u8(_gaussian_noise_u8, frame.data, float(mean), float(std))
+    else:
+        noise = _rng.standard_normal(frame.data.shape, dtype=np.float32)
+        noise *= std
+        noise += mean
+        noise += frame.data
+        noisy_data = np.clip(noise, 0, 255, out=noise).astype(np.uint8)
     
     return Frame(
         data=noisy_data,
@@ -2058,15 +2310,10 @@ def salt_pepper_filter(frame: Frame, amount: float = 0.05, **kwargs) -> Frame:
     """Add salt and pepper noise"""
     noisy_data = frame.data.copy()
     
-    # Salt noise
-    num_salt = np.ceil(amount * frame.data.size * 0.5).astype(int)
-    coords = [np.random.randint(0, i - 1, num_salt) for i in frame.data.shape]
-    noisy_data[coords[0], coords[1]] = 255
-    
-    # Pepper noise
-    num_pepper = np.ceil(amount * frame.data.size * 0.5).astype(int)
-    coords = [np.random.randint(0, i - 1, num_pepper) for i in frame.data.shape]
-    noisy_data[coords[0], coords[1]] = 0
+    # One draw per pixel; the mask broadcasts across all channels
+    r = _rng.random(frame.data.shape[:2], dtype=np.float32)
+    noisy_data[r < amount / 2] = 0
+    noisy_data[r > 1 - amount / 2] = 255
     
     return Frame(
         data=noisy_data,
@@ -2080,8 +2327,14 @@ def salt_pepper_filter(frame: Frame, amount: float = 0.05, **kwargs) -> Frame:
 
 def speckle_filter(frame: Frame, variance: float = 0.1, **kwargs) -> Frame:
     """Add speckle noise"""
-    noise = np.random.randn(*frame.data.shape) * variance
-    noisy_data = np.clip(frame.data.astype(np.float32) + frame.data.astype(np.float32) * noise, 0, 255).astype(np.uint8)
+    if njit is not None:
+        noisy_data = _pointwise_u8(_speckle_u8, frame.data, float(variance))
+    else:
+        gain = _rng.standard_normal(frame.data.shape, dtype=np.float32)
+        gain *= variance
+        gain += 1.0
+        gain *= frame.data
+        noisy_data = np.clip(gain, 0, 255, out=gain).astype(np.uint8)
     
     return Frame(
         data=noisy_data,
@@ -2094,38 +2347,78 @@ def speckle_filter(frame: Frame, variance: float = 0.1, **kwargs) -> Frame:
 
 
 # Feature detection
+_detector_local = threading.local()
+
+
+def _thread_detector(key: tuple, factory: Callable, *args):
+    """Build an OpenCV detector once per stage thread; detector objects are not safe to share between threads"""
+    detectors = _detector_local.__dict__
+    detector = detectors.get(key)
+    if detector is None:
+        detector = detectors[key] = factory(*args)
+    return detector
+
+
+def _cuda_detector(factory: str, *args):
+    """GPU detectors are costly to construct, so keep one per parameter set and thread"""
+    return _thread_detector(("cuda", factory) + args, getattr(cv2.cuda, factory), *args)
+
+
+def _cuda_hough_lines(gray: np.ndarray, rho: float, theta: float, threshold: int) -> Optional[np.ndarray]:
+    """Canny + Hough accumulation on the GPU, returning lines in cv2.HoughLines layout"""
+    gpu_gray = cv2.cuda_GpuMat()
+    gpu_gray.upload(gray)
+    edges = _cuda_detector("createCannyEdgeDetector", 50.0, 150.0, 3).detect(gpu_gray)
+    gpu_lines = _cuda_detector("createHoughLinesDetector", float(rho), float(theta), int(threshold)).detect(edges)
+    if gpu_lines.empty():
+        return None
+    return gpu_lines.download().reshape(-1, 1, 2)
+
+
+def _cuda_hough_circles(gray: np.ndarray, dp: float, min_dist: int, param1: int, param2: int) -> Optional[np.ndarray]:
+    """Hough gradient circle detection on the GPU, returning circles in cv2.HoughCircles layout"""
+    gpu_gray = cv2.cuda_GpuMat()
+    gpu_gray.upload(gray)
+    detector = _cuda_detector("createHoughCirclesDetector", float(dp), float(min_dist),
+                              int(param1), int(param2), 0, max(gray.shape))
+    gpu_circles = detector.detect(gpu_gray)
+    if gpu_circles.empty():
+        return None
+    return gpu_circles.download().reshape(1, -1, 3)
+
+
 def hough_lines_filter(frame: Frame, rho: float = 1, theta: float = np.pi/180, threshold: int = 100, **kwargs) -> Frame:
     """Detect lines using Hough transform"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
     # Apply edge detection first
-    edges = cv2.Canny(gray_data, 50, 150, apertureSize=3)
-    lines = cv2.HoughLines(edges, rho, theta, threshold)
+    if _CUDA_AVAILABLE:
+        lines = _cuda_hough_lines(gray_data, rho, theta, threshold)
+    else:
+        edges = cv2.Canny(gray_data, 50, 150, apertureSize=3)
+        lines = cv2.HoughLines(edges, rho, theta, threshold)
     
     # Create output frame
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
     else:
         output_data = frame.data.copy()
     
-    # Draw lines
+    # Draw lines: endpoints for every line at once, then a single polylines call
     if lines is not None:
-        for line in lines:
-            rho, theta = line[0]
-            a = np.cos(theta)
-            b = np.sin(theta)
-            x0 = a * rho
-            y0 = b * rho
-            x1 = int(x0 + 1000 * (-b))
-            y1 = int(y0 + 1000 * (a))
-            x2 = int(x0 - 1000 * (-b))
-            y2 = int(y0 - 1000 * (a))
-            cv2.line(output_data, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        rhos, thetas = lines[:, 0, 0], lines[:, 0, 1]
+        a, b = np.cos(thetas), np.sin(thetas)
+        x0, y0 = a * rhos, b * rhos
+        segments = np.stack([
+            np.stack([x0 - 1000 * b, y0 + 1000 * a], axis=-1),
+            np.stack([x0 + 1000 * b, y0 - 1000 * a], axis=-1),
+        ], axis=1).astype(np.int32)
+        cv2.polylines(output_data, segments, False, (0, 0, 255), 2)
     
     return Frame(
         data=output_data,
@@ -2141,15 +2434,18 @@ def hough_circles_filter(frame: Frame, dp: float = 1, min_dist: int = 50, param1
     """Detect circles using Hough transform"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
-    circles = cv2.HoughCircles(gray_data, cv2.HOUGH_GRADIENT, dp, min_dist, param1=param1, param2=param2)
+    if _CUDA_AVAILABLE:
+        circles = _cuda_hough_circles(gray_data, dp, min_dist, param1, param2)
+    else:
+        circles = cv2.HoughCircles(gray_data, cv2.HOUGH_GRADIENT, dp, min_dist, param1=param1, param2=param2)
     
     # Create output frame
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
     else:
         output_data = frame.data.copy()
@@ -2171,30 +2467,45 @@ def hough_circles_filter(frame: Frame, dp: float = 1, min_dist: int = 50, param1
     )
 
 
+def _get_sift():
+    return _thread_detector(("sift",), cv2.SIFT_create)
+
+
+def _get_surf(hessian_threshold: float):
+    return _thread_detector(("surf", hessian_threshold), cv2.xfeatures2d.SURF_create, hessian_threshold)
+
+
+def _get_orb():
+    return _thread_detector(("orb",), cv2.ORB_create)
+
+
+def _get_fast(threshold: Optional[int] = None):
+    args = () if threshold is None else (threshold,)
+    return _thread_detector(("fast",) + args, cv2.FastFeatureDetector_create, *args)
+
+
+def _get_brief():
+    return _thread_detector(("brief",), cv2.xfeatures2d.BriefDescriptorExtractor_create)
+
+
 def sift_filter(frame: Frame, **kwargs) -> Frame:
     """SIFT feature detection"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
     try:
-        sift = cv2.SIFT_create()
+        sift = _get_sift()
         keypoints, descriptors = sift.detectAndCompute(gray_data, None)
         
-        # Create output frame
-        if frame.format == FrameFormat.GRAY:
-            output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
-        else:
-            output_data = frame.data.copy()
-        
-        # Draw keypoints
-        output_data = cv2.drawKeypoints(output_data, keypoints, None, flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
+        # Draw keypoints; drawKeypoints writes to a fresh BGR image, expanding gray input itself
+        output_data = cv2.drawKeypoints(frame.data, keypoints, None, flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
     except AttributeError:
         # SIFT not available, return original frame
-        output_data = frame.data.copy() if frame.format != FrameFormat.GRAY else cv2.cvtColor(frame.data, cv2.COLOR_GRAY2BGR)
+        output_data = frame.data.copy() if frame.format is not FrameFormat.GRAY else cv2.cvtColor(frame.data, cv2.COLOR_GRAY2BGR)
     
     return Frame(
         data=output_data,
@@ -2210,26 +2521,20 @@ def surf_filter(frame: Frame, **kwargs) -> Frame:
     """SURF feature detection"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
     try:
-        surf = cv2.xfeatures2d.SURF_create(400)
+        surf = _get_surf(400)
         keypoints, descriptors = surf.detectAndCompute(gray_data, None)
         
-        # Create output frame
-        if frame.format == FrameFormat.GRAY:
-            output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
-        else:
-            output_data = frame.data.copy()
-        
-        # Draw keypoints
-        output_data = cv2.drawKeypoints(output_data, keypoints, None, flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
+        # Draw keypoints; drawKeypoints writes to a fresh BGR image, expanding gray input itself
+        output_data = cv2.drawKeypoints(frame.data, keypoints, None, flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
     except (AttributeError, cv2.error):
         # SURF not available, return original frame
-        output_data = frame.data.copy() if frame.format != FrameFormat.GRAY else cv2.cvtColor(frame.data, cv2.COLOR_GRAY2BGR)
+        output_data = frame.data.copy() if frame.format is not FrameFormat.GRAY else cv2.cvtColor(frame.data, cv2.COLOR_GRAY2BGR)
     
     return Frame(
         data=output_data,
@@ -2245,22 +2550,16 @@ def orb_filter(frame: Frame, **kwargs) -> Frame:
     """ORB feature detection"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
-    orb = cv2.ORB_create()
+    orb = _get_orb()
     keypoints, descriptors = orb.detectAndCompute(gray_data, None)
     
-    # Create output frame
-    if frame.format == FrameFormat.GRAY:
-        output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
-    else:
-        output_data = frame.data.copy()
-    
-    # Draw keypoints
-    output_data = cv2.drawKeypoints(output_data, keypoints, None, flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
+    # Draw keypoints; drawKeypoints writes to a fresh BGR image, expanding gray input itself
+    output_data = cv2.drawKeypoints(frame.data, keypoints, None, flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
     
     return Frame(
         data=output_data,
@@ -2276,22 +2575,16 @@ def fast_filter(frame: Frame, threshold: int = 10, **kwargs) -> Frame:
     """FAST corner detection"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
-    fast = cv2.FastFeatureDetector_create(threshold)
+    fast = _get_fast(threshold)
     keypoints = fast.detect(gray_data, None)
     
-    # Create output frame
-    if frame.format == FrameFormat.GRAY:
-        output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
-    else:
-        output_data = frame.data.copy()
-    
-    # Draw keypoints
-    output_data = cv2.drawKeypoints(output_data, keypoints, None, color=(255, 0, 0))
+    # Draw keypoints; drawKeypoints writes to a fresh BGR image, expanding gray input itself
+    output_data = cv2.drawKeypoints(frame.data, keypoints, None, color=(255, 0, 0))
     
     return Frame(
         data=output_data,
@@ -2307,31 +2600,25 @@ def brief_filter(frame: Frame, **kwargs) -> Frame:
     """BRIEF feature description"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
     # First detect keypoints using FAST
-    fast = cv2.FastFeatureDetector_create()
+    fast = _get_fast()
     keypoints = fast.detect(gray_data, None)
     
     try:
-        brief = cv2.xfeatures2d.BriefDescriptorExtractor_create()
+        brief = _get_brief()
         keypoints, descriptors = brief.compute(gray_data, keypoints)
     except (AttributeError, cv2.error):
         # BRIEF not available, use ORB instead
-        orb = cv2.ORB_create()
+        orb = _get_orb()
         keypoints, descriptors = orb.compute(gray_data, keypoints)
     
-    # Create output frame
-    if frame.format == FrameFormat.GRAY:
-        output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
-    else:
-        output_data = frame.data.copy()
-    
-    # Draw keypoints
-    output_data = cv2.drawKeypoints(output_data, keypoints, None, color=(0, 255, 0))
+    # Draw keypoints; drawKeypoints writes to a fresh BGR image, expanding gray input itself
+    output_data = cv2.drawKeypoints(frame.data, keypoints, None, color=(0, 255, 0))
     
     return Frame(
         data=output_data,
@@ -2343,6 +2630,20 @@ def brief_filter(frame: Frame, **kwargs) -> Frame:
     )
 
 
+_TEMPLATE_METHODS = frozenset({
+    'TM_CCOEFF', 'TM_CCOEFF_NORMED', 'TM_CCORR', 'TM_CCORR_NORMED', 'TM_SQDIFF', 'TM_SQDIFF_NORMED'
+})
+
+
+@lru_cache(maxsize=8)
+def _load_template(path: str, mtime: float) -> Optional[np.ndarray]:
+    """Decode a template image once; the mtime key picks up edits to the file"""
+    template_img = cv2.imread(path, 0)
+    if template_img is not None:
+        template_img.flags.writeable = False
+    return template_img
+
+
 def template_match_filter(frame: Frame, template: str = "", method: str = "TM_CCOEFF_NORMED", **kwargs) -> Frame:
     """Template matching"""
     _require_cv2()
@@ -2350,42 +2651,37 @@ def template_match_filter(frame: Frame, template: str = "", method: str = "TM_CC
         return frame  # No template provided
     
     try:
-        template_img = cv2.imread(template, 0)
+        template_img = _load_template(template, os.path.getmtime(template))
         if template_img is None:
             return frame
     except:
         return frame
     
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
-    # Template matching
-    method_dict = {
-        'TM_CCOEFF': cv2.TM_CCOEFF,
-        'TM_CCOEFF_NORMED': cv2.TM_CCOEFF_NORMED,
-        'TM_CCORR': cv2.TM_CCORR,
-        'TM_CCORR_NORMED': cv2.TM_CCORR_NORMED,
-        'TM_SQDIFF': cv2.TM_SQDIFF,
-        'TM_SQDIFF_NORMED': cv2.TM_SQDIFF_NORMED
-    }
-    
-    cv_method = method_dict.get(method, cv2.TM_CCOEFF_NORMED)
-    result = cv2.matchTemplate(gray_data, template_img, cv_method)
+    # Template matching into a reused score buffer
+    cv_method = getattr(cv2, method if method in _TEMPLATE_METHODS else 'TM_CCOEFF_NORMED')
+    h, w = template_img.shape
+    result_shape = (gray_data.shape[0] - h + 1, gray_data.shape[1] - w + 1)
+    if min(result_shape) < 1:
+        return frame  # Template larger than the frame
+    result = cv2.matchTemplate(gray_data, template_img, cv_method,
+                               result=_scratch("template_match", result_shape, np.float32))
     
     # Find best match
     min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
     
     # Create output frame
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
     else:
         output_data = frame.data.copy()
     
     # Draw rectangle around match
-    h, w = template_img.shape
     if cv_method in [cv2.TM_SQDIFF, cv2.TM_SQDIFF_NORMED]:
         top_left = min_loc
     else:
@@ -2404,44 +2700,53 @@ def template_match_filter(frame: Frame, template: str = "", method: str = "TM_CC
 
 
 # Segmentation
+_WATERSHED_KERNEL = np.ones((3, 3), np.uint8)
+_WATERSHED_KERNEL.flags.writeable = False
+
+
 def watershed_filter(frame: Frame, **kwargs) -> Frame:
     """Watershed segmentation"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
+    # Intermediates live in per-thread scratch buffers; only output_data escapes
+    shape = gray_data.shape
+    
     # Apply threshold
-    ret, thresh = cv2.threshold(gray_data, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    thresh = _scratch("watershed_thresh", shape)
+    cv2.threshold(gray_data, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU, dst=thresh)
     
     # Remove noise
-    kernel = np.ones((3, 3), np.uint8)
-    opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel, iterations=2)
+    opening = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, _WATERSHED_KERNEL,
+                               dst=_scratch("watershed_opening", shape), iterations=2)
     
     # Sure background area
-    sure_bg = cv2.dilate(opening, kernel, iterations=3)
+    sure_bg = cv2.dilate(opening, _WATERSHED_KERNEL, dst=_scratch("watershed_sure_bg", shape), iterations=3)
     
-    # Sure foreground area
-    dist_transform = cv2.distanceTransform(opening, cv2.DIST_L2, 5)
-    ret, sure_fg = cv2.threshold(dist_transform, 0.7 * dist_transform.max(), 255, 0)
+    # Sure foreground area, compared straight into a uint8 mask
+    dist_transform = cv2.distanceTransform(opening, cv2.DIST_L2, 5,
+                                           dst=_scratch("watershed_dist", shape, np.float32))
+    sure_fg = cv2.compare(dist_transform, 0.7 * float(dist_transform.max()), cv2.CMP_GT,
+                          dst=_scratch("watershed_sure_fg", shape))
     
     # Unknown region
-    sure_fg = np.uint8(sure_fg)
-    unknown = cv2.subtract(sure_bg, sure_fg)
+    unknown = cv2.subtract(sure_bg, sure_fg, dst=_scratch("watershed_unknown", shape))
     
     # Marker labelling
-    ret, markers = cv2.connectedComponents(sure_fg)
+    ret, markers = cv2.connectedComponents(sure_fg, labels=_scratch("watershed_markers", shape, np.int32))
     
     # Add one to all labels so that sure background is not 0, but 1
-    markers = markers + 1
+    np.add(markers, 1, out=markers)
     
     # Mark the region of unknown with zero
     markers[unknown == 255] = 0
     
     # Apply watershed
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         output_data = cv2.cvtColor(gray_data, cv2.COLOR_GRAY2BGR)
     else:
         output_data = frame.data.copy()
@@ -2459,20 +2764,51 @@ def watershed_filter(frame: Frame, **kwargs) -> Frame:
     )
 
 
+_KMEANS_SAMPLE_STRIDE = 16
+
+
+@_jit(parallel=True, cache=True, boundscheck=False)
+def _kmeans_assign_u8(pixels: np.ndarray, centers: np.ndarray, palette: np.ndarray, out: np.ndarray):
+    """Write each pixel's nearest-center color straight from the uint8 input"""
+    n, c = pixels.shape
+    k = centers.shape[0]
+    for i in prange(n):
+        best = 0
+        best_d = np.inf
+        for j in range(k):
+            d = 0.0
+            for ch in range(c):
+                diff = np.float32(pixels[i, ch]) - centers[j, ch]
+                d += diff * diff
+            if d < best_d:
+                best_d = d
+                best = j
+        for ch in range(c):
+            out[i, ch] = palette[best, ch]
+
+
 def kmeans_filter(frame: Frame, k: int = 3, **kwargs) -> Frame:
     """K-means clustering segmentation"""
     _require_cv2()
     # Reshape data for K-means
     data = frame.data.reshape((-1, frame.channels))
-    data = np.float32(data)
     
-    # Define criteria and apply K-means
+    # Fit centers on a strided sample with k-means++ seeding and a single attempt
+    sample = data[::_KMEANS_SAMPLE_STRIDE]
+    if len(sample) < k:
+        sample = data
     criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 20, 1.0)
-    ret, label, center = cv2.kmeans(data, k, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    ret, label, center = cv2.kmeans(np.float32(sample), k, None, criteria, 1, cv2.KMEANS_PP_CENTERS)
     
-    # Convert back to uint8 and reshape
-    center = np.uint8(center)
-    result = center[label.flatten()]
+    # Assign every pixel to its nearest center and map to the uint8 palette
+    palette = np.uint8(center)
+    if njit is not None:
+        result = np.empty(data.shape, dtype=np.uint8)
+        _kmeans_assign_u8(np.ascontiguousarray(data), center, palette, result)
+    else:
+        # |x - c|^2 without the per-pixel |x|^2 term, which does not affect the argmin
+        distances = (center * center).sum(axis=1) - 2.0 * (data.astype(np.float32) @ center.T)
+        result = palette[distances.argmin(axis=1)]
     result = result.reshape(frame.data.shape)
     
     return Frame(
@@ -2485,40 +2821,66 @@ def kmeans_filter(frame: Frame, k: int = 3, **kwargs) -> Frame:
     )
 
 
+@_jit(cache=True, boundscheck=False)
+def _region_grow_core(gray: np.ndarray, seed_r: int, seed_c: int, threshold: int) -> np.ndarray:
+    """Grow a 4-connected region from the seed using a flat index stack"""
+    h, w = gray.shape
+    segmented = np.zeros((h, w), dtype=np.uint8)
+    if threshold < 0:
+        return segmented
+
+    # Pixels are marked when pushed, so the stack never exceeds h * w entries
+    stack = np.empty(h * w, dtype=np.int32)
+    seed_value = np.int32(gray[seed_r, seed_c])
+    segmented[seed_r, seed_c] = 255
+    stack[0] = seed_r * w + seed_c
+    top = 1
+
+    while top > 0:
+        top -= 1
+        r = stack[top] // w
+        c = stack[top] - r * w
+        for k in range(4):
+            nr = r + (-1, 1, 0, 0)[k]
+            nc = c + (0, 0, -1, 1)[k]
+            if nr < 0 or nr >= h or nc < 0 or nc >= w or segmented[nr, nc] != 0:
+                continue
+            # int32 arithmetic avoids uint8 wrap-around in the difference
+            if abs(np.int32(gray[nr, nc]) - seed_value) <= threshold:
+                segmented[nr, nc] = 255
+                stack[top] = nr * w + nc
+                top += 1
+
+    return segmented
+
+
+def _region_grow_flood(gray: np.ndarray, seed_r: int, seed_c: int, threshold: int) -> np.ndarray:
+    """Grow the same region with cv2.floodFill when numba is unavailable"""
+    h, w = gray.shape
+    if threshold < 0:
+        return np.zeros((h, w), dtype=np.uint8)
+
+    mask = np.zeros((h + 2, w + 2), dtype=np.uint8)
+    flags = 4 | cv2.FLOODFILL_FIXED_RANGE | cv2.FLOODFILL_MASK_ONLY | (255 << 8)
+    cv2.floodFill(gray, mask, (seed_c, seed_r), 0, threshold, threshold, flags)
+    return mask[1:-1, 1:-1].copy()
+
+
 def region_growing_filter(frame: Frame, threshold: int = 10, **kwargs) -> Frame:
     """Region growing segmentation"""
     _require_cv2()
     # Convert to grayscale if needed
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
     # Simple region growing from center
-    visited = np.zeros_like(gray_data, dtype=bool)
-    segmented = np.zeros_like(gray_data)
-    
     h, w = gray_data.shape
-    seed = (h // 2, w // 2)
-    seed_value = gray_data[seed]
-    
-    stack = [seed]
-    region_value = 255
-    
-    while stack:
-        x, y = stack.pop()
-        if visited[x, y]:
-            continue
-        
-        if abs(int(gray_data[x, y]) - int(seed_value)) <= threshold:
-            visited[x, y] = True
-            segmented[x, y] = region_value
-            
-            # Add neighbors
-            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < h and 0 <= ny < w and not visited[nx, ny]:
-                    stack.append((nx, ny))
+    if njit is not None:
+        segmented = _region_grow_core(np.ascontiguousarray(gray_data), h // 2, w // 2, int(threshold))
+    else:
+        segmented = _region_grow_flood(gray_data, h // 2, w // 2, int(threshold))
     
     return Frame(
         data=segmented,
@@ -2531,6 +2893,14 @@ def region_growing_filter(frame: Frame, threshold: int = 10, **kwargs) -> Frame:
 
 
 # Additional source functions
+@lru_cache(maxsize=4)
+def _solid_color_data(width: int, height: int, color: tuple) -> np.ndarray:
+    """Read-only solid color buffer shared by every frame with the same size and color"""
+    data = np.full((height, width, 3), color, dtype=np.uint8)
+    data.flags.writeable = False
+    return data
+
+
 def solid_color_source(frame: Optional[Frame], width: int = 640, height: int = 480, color: list = None, **kwargs) -> Frame:
     """Generate solid color frames"""
     if color is None:
@@ -2540,8 +2910,8 @@ def solid_color_source(frame: Optional[Frame], width: int = 640, height: int = 4
     if len(color) < 3:
         color = color + [0] * (3 - len(color))
     
-    # Create solid color frame
-    frame_data = np.full((height, width, 3), color, dtype=np.uint8)
+    # Output is identical frame to frame, so reuse the cached buffer
+    frame_data = _solid_color_data(width, height, tuple(color))
     
     return Frame(
         data=frame_data,
@@ -2555,11 +2925,12 @@ def solid_color_source(frame: Optional[Frame], width: int = 640, height: int = 4
 def random_noise_source(frame: Optional[Frame], width: int = 640, height: int = 480, noise_type: str = "uniform", **kwargs) -> Frame:
     """Generate random noise frames"""
     if noise_type == "gaussian":
-        frame_data = np.random.normal(128, 50, (height, width, 3))
+        samples = _rng.standard_normal((height, width, 3), dtype=np.float32)
+        samples *= 50
+        samples += 128
+        frame_data = np.clip(samples, 0, 255, out=samples).astype(np.uint8)
     else:  # uniform
-        frame_data = np.random.randint(0, 256, (height, width, 3))
-    
-    frame_data = np.clip(frame_data, 0, 255).astype(np.uint8)
+        frame_data = _rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
     
     return Frame(
         data=frame_data,
@@ -2593,26 +2964,142 @@ def image_loader_source(frame: Optional[Frame], filename: str = "", **kwargs) ->
         return None
 
 
+@_jit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+def _mandelbrot_kernel(x: np.ndarray, y: np.ndarray, max_iter: int, M: np.ndarray):
+    """Escape-time count per pixel, iterating in registers and stopping once |z| > 2"""
+    for r in prange(y.size):
+        ci = y[r]
+        for c in range(x.size):
+            cr = x[c]
+            zr = 0.0
+            zi = 0.0
+            count = 0
+            for i in range(max_iter):
+                if zr * zr + zi * zi > 4.0:
+                    break
+                count = i
+                zr, zi = zr * zr - zi * zi + cr, 2.0 * zr * zi + ci
+            M[r, c] = count
+
+
+if _NUMBA_CUDA_AVAILABLE:
+    @numba_cuda.jit
+    def _mandelbrot_cuda_kernel(x, y, max_iter, M):
+        """One pixel per thread; same escape-time loop as _mandelbrot_kernel"""
+        r, c = numba_cuda.grid(2)
+        if r < M.shape[0] and c < M.shape[1]:
+            cr = x[c]
+            ci = y[r]
+            zr = 0.0
+            zi = 0.0
+            count = 0
+            for i in range(max_iter):
+                if zr * zr + zi * zi > 4.0:
+                    break
+                count = i
+                zr, zi = zr * zr - zi * zi + cr, 2.0 * zr * zi + ci
+            M[r, c] = count
+
+
+def _mandelbrot_cuda(x: np.ndarray, y: np.ndarray, max_iter: int) -> np.ndarray:
+    """Escape-time counts computed on the GPU.
+    
+    The counts land in a per-thread page-locked host buffer so the copy
+    back is a straight DMA; callers must not hand that buffer on as frame
+    data.
+    """
+    shape = (y.size, x.size)
+    buffers = _scratch_local.__dict__
+    M = buffers.get("mandelbrot_pinned")
+    if M is None or M.shape != shape:
+        M = buffers["mandelbrot_pinned"] = numba_cuda.pinned_array(shape, dtype=np.uint8)
+    d_M = numba_cuda.device_array(shape, dtype=np.uint8)
+    block = (16, 16)
+    grid = ((shape[0] + block[0] - 1) // block[0], (shape[1] + block[1] - 1) // block[1])
+    _mandelbrot_cuda_kernel[grid, block](numba_cuda.to_device(x), numba_cuda.to_device(y), max_iter, d_M)
+    d_M.copy_to_host(M)
+    return M
+
+
+def _mandelbrot_numpy(cr: np.ndarray, ci: np.ndarray, max_iter: int) -> np.ndarray:
+    """Escape-time counts, iterating only over pixels that have not diverged.
+    
+    Live pixels are kept as compacted 1-D planes updated in place; a pixel
+    is dropped, and its count recorded, on the iteration |z|^2 exceeds 4.
+    """
+    shape = np.broadcast_shapes(cr.shape, ci.shape)
+    cr = np.broadcast_to(cr, shape).ravel()
+    ci = np.broadcast_to(ci, shape).ravel()
+    idx = np.arange(cr.size)
+    zr = np.zeros(cr.size, dtype=cr.dtype)
+    zi = np.zeros(cr.size, dtype=cr.dtype)
+    zr2 = np.zeros(cr.size, dtype=cr.dtype)
+    zi2 = np.zeros(cr.size, dtype=cr.dtype)
+    M = np.full(cr.size, max_iter - 1, dtype=np.uint8)
+    
+    for i in range(max_iter):
+        live = zr2 + zi2 <= 4.0
+        if not live.all():
+            M[idx[~live]] = i - 1
+            idx, cr, ci, zr, zi, zr2, zi2 = (a[live] for a in (idx, cr, ci, zr, zi, zr2, zi2))
+            if not idx.size:
+                break
+        
+        # z = z^2 + c
+        np.multiply(zr, zi, out=zi)
+        zi *= 2.0
+        zi += ci
+        np.subtract(zr2, zi2, out=zr)
+        zr += cr
+        np.multiply(zr, zr, out=zr2)
+        np.multiply(zi, zi, out=zi2)
+    
+    return M.reshape(shape)
+
+
+@lru_cache(maxsize=8)
+def _mandelbrot_axes(width: int, height: int, zoom: float, center_x: float, center_y: float):
+    """Read-only real and imaginary axes, shared while the view is unchanged"""
+    x = np.linspace(center_x - 2/zoom, center_x + 2/zoom, width)
+    y = np.linspace(center_y - 2/zoom, center_y + 2/zoom, height)
+    x.flags.writeable = False
+    y.flags.writeable = False
+    return x, y
+
+
+def _mandelbrot_float32_ok(x: np.ndarray, y: np.ndarray) -> bool:
+    """Whether float32 planes still resolve neighbouring pixels.
+    
+    float32 halves the memory traffic of the numpy iteration, but it keeps
+    only 24 mantissa bits; require the pixel step to stay above 2**-12 of
+    the largest coordinate, otherwise deep zooms dissolve into blocks.
+    """
+    step = min(abs(x[1] - x[0]) if x.size > 1 else np.inf,
+               abs(y[1] - y[0]) if y.size > 1 else np.inf)
+    extent = max(abs(x[0]), abs(x[-1]), abs(y[0]), abs(y[-1]))
+    return step >= extent * 2.0 ** -12
+
+
 def mandelbrot_source(frame: Optional[Frame], width: int = 640, height: int = 480, 
                      zoom: float = 1.0, center_x: float = -0.5, center_y: float = 0.0, **kwargs) -> Frame:
     """Generate Mandelbrot fractal"""
-    # Create coordinate matrices
-    x = np.linspace(center_x - 2/zoom, center_x + 2/zoom, width)
-    y = np.linspace(center_y - 2/zoom, center_y + 2/zoom, height)
-    X, Y = np.meshgrid(x, y)
-    C = X + 1j * Y
+    x, y = _mandelbrot_axes(width, height, zoom, center_x, center_y)
     
     # Calculate Mandelbrot set
-    Z = np.zeros_like(C)
-    M = np.zeros(C.shape)
-    
-    for i in range(256):
-        mask = np.abs(Z) <= 2
-        Z[mask] = Z[mask]**2 + C[mask]
-        M[mask] = i
-    
-    # Convert to color
-    M = (M * 255 / M.max()).astype(np.uint8)
+    if _NUMBA_CUDA_AVAILABLE:
+        M = _mandelbrot_cuda(x, y, 256)
+    elif njit is not None:
+        M = np.empty((height, width), dtype=np.uint8)
+        _mandelbrot_kernel(x, y, 256, M)
+    else:
+        if _mandelbrot_float32_ok(x, y):
+            x, y = x.astype(np.float32), y.astype(np.float32)
+        M = _mandelbrot_numpy(x, y[:, None], 256)
+    
+    # Convert to color, stretching the counts through a lookup table
+    peak = int(M.max())
+    scale = np.arange(256) * 255 // peak if peak else np.zeros(256)
+    M = cv2.LUT(M, scale.astype(np.uint8))
     frame_data = cv2.applyColorMap(M, cv2.COLORMAP_HOT)
     
     return Frame(
@@ -2625,39 +3112,92 @@ def mandelbrot_source(frame: Optional[Frame], width: int = 640, height: int = 48
 
 
 # Additional sink functions for comprehensive library
-def csv_export_sink(frame: Frame, filename: str = "stats.csv", **kwargs) -> bool:
-    """Export frame statistics to CSV"""
-    import csv
-    import os
-    
-    stats = {
-        'timestamp': frame.timestamp,
-        'width': frame.width,
-        'height': frame.height,
-        'format': frame.format.value,
-        'mean': float(np.mean(frame.data)),
-        'std': float(np.std(frame.data)),
-        'min': int(np.min(frame.data)),
-        'max': int(np.max(frame.data))
-    }
-    
-    file_exists = os.path.exists(filename)
-    
-    try:
-        with open(filename, 'a', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=stats.keys())
-            if not file_exists:
+_CV_STAT_DTYPES = frozenset(map(np.dtype, (np.uint8, np.int8, np.uint16, np.int16,
+                                            np.int32, np.float32, np.float64)))
+
+
+def _frame_stats(data: np.ndarray):
+    """Return ``(mean, std, min, max)`` over every sample of ``data``."""
+    if cv2 is not None and data.dtype in _CV_STAT_DTYPES:
+        samples = data.reshape(data.shape[0], -1)  # single-channel 2-D view
+        mean, std = cv2.meanStdDev(samples)
+        low, high, _, _ = cv2.minMaxLoc(samples)
+        return float(mean[0, 0]), float(std[0, 0]), int(low), int(high)
+    return float(np.mean(data)), float(np.std(data)), int(np.min(data)), int(np.max(data))
+
+
+class CsvExportSink:
+    """Append per-frame statistics to CSV files.
+
+    One handle and ``DictWriter`` is kept open per filename and rows are
+    flushed in batches of ``flush_every`` frames (and at interpreter exit)
+    rather than reopening the file for every frame.
+    """
+
+    FIELDS = ('timestamp', 'width', 'height', 'format', 'mean', 'std', 'min', 'max')
+
+    def __init__(self, flush_every: int = 30):
+        self.flush_every = flush_every
+        self._writers: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _writer(self, filename: str) -> list:
+        entry = self._writers.get(filename)
+        if entry is None:
+            handle = open(filename, 'a', newline='', buffering=1 << 16)
+            writer = csv.DictWriter(handle, fieldnames=self.FIELDS)
+            if handle.tell() == 0:
                 writer.writeheader()
-            writer.writerow(stats)
-        return True
-    except:
-        return False
+            entry = self._writers[filename] = [handle, writer, 0]
+        return entry
+
+    def __call__(self, frame: Frame, filename: str = "stats.csv", **kwargs) -> bool:
+        """Export frame statistics to CSV"""
+        mean, std, low, high = _frame_stats(frame.data)
+        stats = {
+            'timestamp': frame.timestamp,
+            'width': frame.width,
+            'height': frame.height,
+            'format': frame.format.value,
+            'mean': mean,
+            'std': std,
+            'min': low,
+            'max': high
+        }
+
+        try:
+            with self._lock:
+                entry = self._writer(filename)
+                entry[1].writerow(stats)
+                entry[2] += 1
+                if entry[2] >= self.flush_every:
+                    entry[0].flush()
+                    entry[2] = 0
+            return True
+        except Exception:
+            return False
+
+    def flush(self):
+        """Flush buffered rows of every open file"""
+        with self._lock:
+            for entry in self._writers.values():
+                entry[0].flush()
+                entry[2] = 0
+
+    def close(self):
+        """Flush and close every open file"""
+        with self._lock:
+            for handle, _, _ in self._writers.values():
+                handle.close()
+            self._writers.clear()
+
+
+csv_export_sink = CsvExportSink()
 
 
 def json_export_sink(frame: Frame, filename: str = "metadata.json", **kwargs) -> bool:
     """Export frame metadata to JSON"""
-    import json
-    
     metadata = {
         'timestamp': frame.timestamp,
         'width': frame.width,
@@ -2667,46 +3207,103 @@ def json_export_sink(frame: Frame, filename: str = "metadata.json", **kwargs) ->
     }
     
     try:
-        with open(filename, 'w') as jsonfile:
-            json.dump(metadata, jsonfile, indent=2)
+        if orjson is not None:
+            payload = orjson.dumps(metadata, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                                   | orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            payload = json.dumps(metadata, indent=2).encode()
+        with open(filename, 'wb') as jsonfile:
+            jsonfile.write(payload)
         return True
     except:
         return False
 
 
+# Column-wise bar segments for the 512px histogram canvas: (x, 399) -> (x, top)
+_HIST_SEGMENTS = np.zeros((512, 2, 2), dtype=np.int32)
+_HIST_SEGMENTS[:, :, 0] = np.arange(512, dtype=np.int32)[:, None]
+_HIST_SEGMENTS[:, 0, 1] = 399
+
+
+def _fill_histogram_bars(hist_img: np.ndarray, hist: np.ndarray, color) -> None:
+    """Paint 2px-wide filled bars for a normalized 256-bin histogram.
+
+    Equivalent to one filled ``cv2.rectangle`` per bin, drawn as a single
+    ``cv2.polylines`` call of vertical column segments. Bars span columns
+    ``2i..2i+2``, so even columns are shared with the previous bin and show
+    whichever bar reaches higher.
+    """
+    tops = 400 - hist.ravel().astype(np.int32)
+    column_tops = np.repeat(tops, 2)
+    np.minimum(column_tops[2::2], tops[:-1], out=column_tops[2::2])
+    segments = _HIST_SEGMENTS.copy()
+    segments[:, 1, 1] = column_tops
+    cv2.polylines(hist_img, list(segments[column_tops < 400]), False, color, 1)
+
+
+@_jit(cache=True, boundscheck=False)
+def _bgr_histograms_kernel(pixels: np.ndarray, out: np.ndarray):
+    """Count all three channels of an (N, 3) uint8 view in a single scan"""
+    out[:] = 0
+    for i in range(pixels.shape[0]):
+        out[0, pixels[i, 0]] += 1
+        out[1, pixels[i, 1]] += 1
+        out[2, pixels[i, 2]] += 1
+
+
+def _bgr_histograms(data: np.ndarray) -> np.ndarray:
+    """Per-channel 256-bin histograms of a BGR frame as a (3, 256) float32 array"""
+    if (njit is not None and data.dtype == np.uint8 and data.ndim == 3
+            and data.shape[2] == 3 and data.flags.c_contiguous):
+        hists = np.empty((3, 256), dtype=np.float32)
+        _bgr_histograms_kernel(data.reshape(-1, 3), hists)
+        return hists
+    return np.stack([cv2.calcHist([data], [i], None, [256], [0, 256]).ravel() for i in range(3)])
+
+
 def histogram_sink(frame: Frame, window_name: str = "Histogram", **kwargs) -> bool:
     """Display live histogram"""
     _require_cv2()
     
-    if frame.format == FrameFormat.GRAY:
+    hist_img = np.zeros((400, 512, 3), dtype=np.uint8)
+    if frame.format is FrameFormat.GRAY:
         hist = cv2.calcHist([frame.data], [0], None, [256], [0, 256])
-        hist_img = np.zeros((400, 512, 3), dtype=np.uint8)
         hist = cv2.normalize(hist, hist, 0, 400, cv2.NORM_MINMAX)
-        
-        for i in range(256):
-            h = int(hist[i])
-            cv2.rectangle(hist_img, (i*2, 400), (i*2+2, 400-h), (255, 255, 255), -1)
+        _fill_histogram_bars(hist_img, hist, (255, 255, 255))
     else:
-        hist_img = np.zeros((400, 512, 3), dtype=np.uint8)
         colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255)]
         
-        for i, color in enumerate(colors):
-            hist = cv2.calcHist([frame.data], [i], None, [256], [0, 256])
+        for hist, color in zip(_bgr_histograms(frame.data), colors):
             hist = cv2.normalize(hist, hist, 0, 400, cv2.NORM_MINMAX)
-            
-            for j in range(256):
-                h = int(hist[j])
-                cv2.rectangle(hist_img, (j*2, 400), (j*2+2, 400-h), color, -1)
+            _fill_histogram_bars(hist_img, hist, color)
     
     cv2.imshow(window_name, hist_img)
     return cv2.waitKey(1) & 0xFF != ord('q')
 
 
 # Comprehensive set of processing functions
-def invert_filter(frame: Frame, **kwargs) -> Frame:
-    """Invert colors"""
+def invert_filter(frame: Frame, inplace: bool = False, **kwargs) -> Frame:
+    """Invert colors
+
+    With ``inplace=True`` the input frame's buffer is overwritten and the same
+    Frame is returned. Buffers shared on a fan-out are read-only and are
+    never modified; they fall back to a fresh output.
+    """
+    if inplace and frame.data.flags.writeable:
+        if cv2 is not None and frame.data.dtype == np.uint8:
+            cv2.bitwise_not(frame.data, dst=frame.data)
+        else:
+            np.subtract(255, frame.data, out=frame.data)
+        return frame
+
+    inverted_data = FRAME_POOL.acquire(frame.data.shape, frame.data.dtype)
+    if cv2 is not None and frame.data.dtype == np.uint8:
+        cv2.bitwise_not(frame.data, dst=inverted_data)  # 255 - x is a byte-wise NOT for uint8
+    else:
+        np.subtract(255, frame.data, out=inverted_data)
+    
     return Frame(
-        data=255 - frame.data,
+        data=inverted_data,
         format=frame.format,
         width=frame.width,
         height=frame.height,
@@ -2715,19 +3312,23 @@ def invert_filter(frame: Frame, **kwargs) -> Frame:
     )
 
 
+_SEPIA_MATRIX = np.array([[0.272, 0.534, 0.131],
+                          [0.349, 0.686, 0.168],
+                          [0.393, 0.769, 0.189]], dtype=np.float32)
+_SEPIA_MATRIX.flags.writeable = False
+
+
 def sepia_filter(frame: Frame, **kwargs) -> Frame:
     """Apply sepia tone effect"""
-    sepia_matrix = np.array([[0.272, 0.534, 0.131],
-                            [0.349, 0.686, 0.168],
-                            [0.393, 0.769, 0.189]])
-    
-    if frame.format == FrameFormat.GRAY:
+    _require_cv2()
+    if frame.format is FrameFormat.GRAY:
         bgr_data = cv2.cvtColor(frame.data, cv2.COLOR_GRAY2BGR)
     else:
         bgr_data = frame.data
     
-    sepia_data = np.dot(bgr_data, sepia_matrix.T)
-    sepia_data = np.clip(sepia_data, 0, 255).astype(np.uint8)
+    # Per-pixel matrix product with uint8 saturation in a single pass
+    sepia_data = cv2.transform(bgr_data, _SEPIA_MATRIX,
+                               dst=FRAME_POOL.acquire(bgr_data.shape, np.uint8))
     
     return Frame(
         data=sepia_data,
@@ -2739,15 +3340,50 @@ def sepia_filter(frame: Frame, **kwargs) -> Frame:
     )
 
 
+@_jit(parallel=True, cache=True, boundscheck=False)
+def _bgr_threshold_fused(bgr_rows: np.ndarray, thresh: int, out: np.ndarray):
+    """BGR -> luma -> binary threshold in a single pass over the input.
+
+    ``bgr_rows`` is the frame viewed as (height, width * 3). Uses the 15-bit
+    fixed-point BT.601 weights and rounding of OpenCV's 8-bit BGR2GRAY, so
+    the result matches cvtColor followed by THRESH_BINARY exactly (checked
+    over all 2**24 colors).
+    """
+    h, w = out.shape
+    for r in prange(h):
+        row = bgr_rows[r]
+        dst = out[r]
+        for c in range(w):
+            y = (3735 * np.int32(row[3 * c]) + 19235 * np.int32(row[3 * c + 1])
+                 + 9798 * np.int32(row[3 * c + 2]) + 16384) >> 15
+            dst[c] = 255 if y > thresh else 0
+
+
 def black_white_filter(frame: Frame, threshold: int = 127, **kwargs) -> Frame:
     """Convert to black and white with threshold"""
     _require_cv2()
-    if frame.format != FrameFormat.GRAY:
+    data = frame.data
+    if (njit is not None and frame.format is not FrameFormat.GRAY and data.dtype == np.uint8
+            and data.ndim == 3 and data.shape[2] == 3 and data.flags.c_contiguous):
+        # cv2.threshold floors the threshold for 8-bit input
+        bw_data = FRAME_POOL.acquire(data.shape[:2], np.uint8)
+        _bgr_threshold_fused(data.reshape(data.shape[0], -1), int(np.floor(threshold)), bw_data)
+        return Frame(
+            data=bw_data,
+            format=FrameFormat.GRAY,
+            width=frame.width,
+            height=frame.height,
+            timestamp=frame.timestamp,
+            metadata=frame.metadata.copy()
+        )
+
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
     
-    _, bw_data = cv2.threshold(gray_data, threshold, 255, cv2.THRESH_BINARY)
+    _, bw_data = cv2.threshold(gray_data, threshold, 255, cv2.THRESH_BINARY,
+                               dst=FRAME_POOL.acquire(gray_data.shape, gray_data.dtype))
     
     return Frame(
         data=bw_data,
@@ -2759,16 +3395,37 @@ def black_white_filter(frame: Frame, threshold: int = 127, **kwargs) -> Frame:
     )
 
 
+# Sepia output always has R as its largest channel, also once saturated to
+# uint8, so scaling HSV saturation by 0.6 (V = max fixed, each channel pulled
+# 40% towards it) is the linear map c' = 0.6 * c + 0.4 * R. It must run on
+# the saturated sepia: folding it into the sepia matrix would pull G and B
+# towards an unclipped R of up to 344 on bright pixels.
+_VINTAGE_DESATURATE = (
+    0.6 * np.eye(3, dtype=np.float32)
+    + 0.4 * np.array([[0, 0, 1]] * 3, dtype=np.float32)
+)
+_VINTAGE_DESATURATE.flags.writeable = False
+
+
 def vintage_filter(frame: Frame, **kwargs) -> Frame:
     """Apply vintage effect"""
     _require_cv2()
-    sepia_frame = sepia_filter(frame)
-    noise = np.random.normal(0, 25, sepia_frame.data.shape).astype(np.float32)
-    vintage_data = np.clip(sepia_frame.data.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    if frame.format is FrameFormat.GRAY:
+        bgr_data = cv2.cvtColor(frame.data, cv2.COLOR_GRAY2BGR)
+    else:
+        bgr_data = frame.data
     
-    hsv_data = cv2.cvtColor(vintage_data, cv2.COLOR_BGR2HSV)
-    hsv_data[:, :, 1] = hsv_data[:, :, 1] * 0.6
-    vintage_data = cv2.cvtColor(hsv_data, cv2.COLOR_HSV2BGR)
+    # Sepia, then desaturation as a matrix pass instead of an HSV round
+    # trip, then film noise. The noise comes last, so unlike grain added
+    # before desaturating it keeps its full per-channel colour. It is signed
+    # int16 so cv2.add can saturate in both directions straight into a uint8
+    # output, with no float round trip.
+    shape = bgr_data.shape
+    sepia = cv2.transform(bgr_data, _SEPIA_MATRIX, dst=_scratch("vintage_sepia", shape))
+    toned = cv2.transform(sepia, _VINTAGE_DESATURATE, dst=_scratch("vintage_toned", shape))
+    noise = _scratch("vintage_noise", shape, np.int16)
+    cv2.randn(noise, (0, 0, 0), (25, 25, 25))
+    vintage_data = cv2.add(toned, noise, dst=FRAME_POOL.acquire(shape, np.uint8), dtype=cv2.CV_8U)
     
     return Frame(
         data=vintage_data,
@@ -2840,7 +3497,7 @@ def thermal_filter(frame: Frame, **kwargs) -> Frame:
     _require_cv2()
     
     # Convert to grayscale
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -2863,7 +3520,7 @@ def night_vision_filter(frame: Frame, **kwargs) -> Frame:
     _require_cv2()
     
     # Convert to grayscale
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -2890,7 +3547,7 @@ def xray_filter(frame: Frame, **kwargs) -> Frame:
     # Invert colors and convert to grayscale
     inverted = 255 - frame.data
     
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         xray_data = cv2.cvtColor(inverted, cv2.COLOR_BGR2GRAY)
     else:
         xray_data = inverted
@@ -3342,7 +3999,7 @@ def duotone_filter(frame: Frame, color1: list = None, color2: list = None, **kwa
         color2 = [255, 255, 0]  # Cyan
     
     # Convert to grayscale
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -3375,7 +4032,7 @@ def tritone_filter(frame: Frame, color1: list = None, color2: list = None, color
         color3 = [255, 0, 0]  # Blue
     
     # Convert to grayscale
-    if frame.format != FrameFormat.GRAY:
+    if frame.format is not FrameFormat.GRAY:
         gray_data = cv2.cvtColor(frame.data, cv2.COLOR_BGR2GRAY)
     else:
         gray_data = frame.data
@@ -3459,7 +4116,7 @@ def white_balance_filter(frame: Frame, **kwargs) -> Frame:
     """Auto white balance correction"""
     _require_cv2()
     
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         return frame
     
     # Simple white balance using gray world assumption
@@ -3498,7 +4155,7 @@ def exposure_filter(frame: Frame, stops: float = 0, **kwargs) -> Frame:
     # Convert stops to multiplier (2^stops)
     multiplier = 2 ** stops
     
-    exposed_data = np.clip(frame.data.astype(np.float32) * multiplier, 0, 255).astype(np.uint8)
+    exposed_data = _lookup_u8(frame.data, "scale", float(multiplier))
     
     return Frame(
         data=exposed_data,
@@ -3543,7 +4200,7 @@ def vibrance_filter(frame: Frame, vibrance: int = 0, **kwargs) -> Frame:
     """Adjust vibrance"""
     _require_cv2()
     
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         return frame
     
     # Convert to HSV
@@ -3627,7 +4284,7 @@ def denoise_filter(frame: Frame, strength: float = 10, **kwargs) -> Frame:
     """Reduce noise"""
     _require_cv2()
     
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         denoised_data = cv2.fastNlMeansDenoising(frame.data, None, strength, 7, 21)
     else:
         denoised_data = cv2.fastNlMeansDenoisingColored(frame.data, None, strength, strength, 7, 21)
@@ -3833,7 +4490,7 @@ def zoom_blur_filter(frame: Frame, amount: int = 10, **kwargs) -> Frame:
 
 def chromatic_aberration_filter(frame: Frame, strength: int = 2, **kwargs) -> Frame:
     """Add chromatic aberration"""
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         return frame
     
     result_data = frame.data.copy()
@@ -3860,10 +4517,12 @@ def lens_distortion_filter(frame: Frame, amount: float = 0.1, **kwargs) -> Frame
 def film_grain_filter(frame: Frame, intensity: float = 0.1, **kwargs) -> Frame:
     """Add film grain"""
     # Generate grain noise
-    grain = np.random.normal(0, intensity * 255, frame.data.shape).astype(np.float32)
+    grain = _rng.standard_normal(frame.data.shape, dtype=np.float32)
+    grain *= intensity * 255
     
-    # Add grain to image
-    grainy_data = np.clip(frame.data.astype(np.float32) + grain, 0, 255).astype(np.uint8)
+    # Add grain to image, clipping in place
+    grain += frame.data
+    grainy_data = np.clip(grain, 0, 255, out=grain).astype(np.uint8)
     
     return Frame(
         data=grainy_data,
@@ -3879,7 +4538,7 @@ def color_grading_filter(frame: Frame, shadows: list = None, midtones: list = No
     """Apply color grading"""
     _require_cv2()
     
-    if frame.format == FrameFormat.GRAY:
+    if frame.format is FrameFormat.GRAY:
         return frame
     
     # Default color tints
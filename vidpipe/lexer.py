@@ -3,19 +3,98 @@ Lexer for VidPipe language
 """
 
 import re
-from typing import List, Optional
+import sys
+from typing import Dict, List, NoReturn, Optional, Union
 from .tokens import Token, TokenType
 
 
+# Single-pass scanner for ASCII sources; the alternation order mirrors the
+# checks in the character loop below so both paths produce the same tokens
+_TOKEN_RE = re.compile(r"""
+    (?P<WS>[ \t\n\r]+)
+  | (?P<COMMENT>\#[^\n]*)
+  | (?P<NUMBER>[0-9][0-9.]*)
+  | (?P<STRING>"(?:\\[\s\S]|[^"\\])*"|'(?:\\[\s\S]|[^'\\])*')
+  | (?P<UNTERMINATED>["'])
+  | (?P<IDENT>(?:[A-Za-z_]|-[A-Za-z])[A-Za-z0-9_-]*)
+  | (?P<OP>->|~>|=>|&>|\+>|[|()\[\]{},:@=])
+""", re.VERBOSE)
+
+_OPERATORS: Dict[str, TokenType] = {
+    '->': TokenType.SYNC_PIPE,
+    '~>': TokenType.ASYNC_PIPE,
+    '=>': TokenType.BLOCKING_PIPE,
+    '&>': TokenType.PARALLEL,
+    '+>': TokenType.MERGE,
+    '|': TokenType.CHOICE,
+    '(': TokenType.LPAREN,
+    ')': TokenType.RPAREN,
+    '[': TokenType.LBRACKET,
+    ']': TokenType.RBRACKET,
+    '{': TokenType.LBRACE,
+    '}': TokenType.RBRACE,
+    ',': TokenType.COMMA,
+    ':': TokenType.COLON,
+    '@': TokenType.AT,
+    '=': TokenType.EQUALS,
+}
+
+_KEYWORDS: Dict[str, TokenType] = {
+    'with': TokenType.WITH,
+    'pipeline': TokenType.PIPELINE,
+}
+
+# Character classes for the character loop: ASCII characters are looked up
+# in a table, anything else falls back to the str predicates
+_DIGIT, _ALPHA, _IDENT_START, _IDENT, _WS, _OPSTART = 1, 2, 4, 8, 16, 32
+
+
+def _classify(char: str) -> int:
+    flags = 0
+    if char.isdigit():
+        flags |= _DIGIT
+    if char.isalpha():
+        flags |= _ALPHA | _IDENT_START
+    if char == '_':
+        flags |= _IDENT_START
+    if char.isalnum() or char in '-_':
+        flags |= _IDENT
+    if char in ' \t\n\r':
+        flags |= _WS
+    if char in '~=&+|()[]{},:>@':
+        flags |= _OPSTART
+    return flags
+
+
+_CHAR_CLASSES = bytes(_classify(chr(code)) for code in range(128))
+
+
+def _char_class(char: str) -> int:
+    code = ord(char)
+    return _CHAR_CLASSES[code] if code < 128 else _classify(char)
+
+
+_ESCAPE_RE = re.compile(r"\\([\s\S])")
+_ESCAPES: Dict[str, str] = {'n': '\n', 't': '\t'}
+
+
 class Lexer:
-    def __init__(self, source: str):
+    # Fully annotated so the module can be compiled with mypyc unchanged;
+    # the regex scanner below already handles ASCII sources in C
+    source: str
+    position: int
+    line: int
+    column: int
+    tokens: List[Token]
+
+    def __init__(self, source: str) -> None:
         self.source = source
         self.position = 0
         self.line = 1
         self.column = 1
-        self.tokens: List[Token] = []
+        self.tokens = []
     
-    def error(self, message: str):
+    def error(self, message: str) -> NoReturn:
         raise SyntaxError(f"Lexer error at line {self.line}, column {self.column}: {message}")
     
     def peek(self, offset: int = 0) -> Optional[str]:
@@ -36,14 +115,30 @@ class Lexer:
             return char
         return None
     
-    def skip_whitespace(self):
-        while self.peek() and self.peek() in ' \t\n\r':
-            self.advance()
+    def skip_whitespace(self) -> None:
+        source = self.source
+        end = len(source)
+        pos = self.position
+        while pos < end:
+            code = ord(source[pos])
+            if code >= 128 or not _CHAR_CLASSES[code] & _WS:
+                break
+            if code == 10:
+                self.line += 1
+                self.column = 1
+            else:
+                self.column += 1
+            pos += 1
+        self.position = pos
     
-    def skip_comment(self):
+    def skip_comment(self) -> bool:
         if self.peek() == '#':
-            while self.peek() and self.peek() != '\n':
-                self.advance()
+            # Comments end at the next newline, so skip straight to it
+            end = self.source.find('\n', self.position)
+            if end < 0:
+                end = len(self.source)
+            self.column += end - self.position
+            self.position = end
             return True
         return False
     
@@ -51,9 +146,11 @@ class Lexer:
         start_line = self.line
         start_column = self.column
         num_str = ''
+        value: Union[int, float]
         
-        while self.peek() and (self.peek().isdigit() or self.peek() == '.'):
-            num_str += self.advance()
+        while (char := self.peek()) and (_char_class(char) & _DIGIT or char == '.'):
+            num_str += char
+            self.advance()
         
         try:
             value = float(num_str) if '.' in num_str else int(num_str)
@@ -68,10 +165,10 @@ class Lexer:
         quote_char = self.advance()  # Skip opening quote
         string_val = ''
         
-        while self.peek() and self.peek() != quote_char:
-            char = self.advance()
-            if char == '\\' and self.peek():
-                next_char = self.advance()
+        while (char := self.peek()) and char != quote_char:
+            self.advance()
+            if char == '\\' and (next_char := self.peek()):
+                self.advance()
                 if next_char == 'n':
                     string_val += '\n'
                 elif next_char == 't':
@@ -92,20 +189,22 @@ class Lexer:
         return Token(TokenType.STRING, string_val, start_line, start_column)
     
     def read_identifier(self) -> Token:
-        start_line = self.line
         start_column = self.column
-        ident = ''
-        
-        while self.peek() and (self.peek().isalnum() or self.peek() in '-_'):
-            ident += self.advance()
+        source = self.source
+        start = end = self.position
         
-        # Check for keywords
-        if ident == 'with':
-            return Token(TokenType.WITH, ident, start_line, start_column)
-        elif ident == 'pipeline':
-            return Token(TokenType.PIPELINE, ident, start_line, start_column)
+        # Identifiers never span lines, so only the column moves
+        classes = _CHAR_CLASSES
+        while end < len(source):
+            code = ord(source[end])
+            if not (classes[code] if code < 128 else _classify(source[end])) & _IDENT:
+                break
+            end += 1
+        ident = sys.intern(source[start:end])
+        self.position = end
+        self.column += end - start
         
-        return Token(TokenType.IDENTIFIER, ident, start_line, start_column)
+        return Token(_KEYWORDS.get(ident, TokenType.IDENTIFIER), ident, self.line, start_column)
     
     def read_operator(self) -> Optional[Token]:
         start_line = self.line
@@ -175,6 +274,9 @@ class Lexer:
         return None
     
     def tokenize(self) -> List[Token]:
+        if self.source.isascii():
+            return self.tokenize_regex()
+        
         self.tokens = []
         
         while self.position < len(self.source):
@@ -186,17 +288,19 @@ class Lexer:
             if self.skip_comment():
                 continue
             
-            char = self.peek()
+            char = self.source[self.position]
+            flags = _char_class(char)
             
-            if char and char.isdigit():
+            if flags & _DIGIT:
                 self.tokens.append(self.read_number())
-            elif char and (char == '"' or char == "'"):
+            elif char == '"' or char == "'":
                 self.tokens.append(self.read_string())
-            elif char and (char.isalpha() or char == '_'):
+            elif flags & _IDENT_START:
                 self.tokens.append(self.read_identifier())
-            elif char and char == '-':
+            elif char == '-':
                 # Check if this is an identifier starting with '-' or an operator
-                if self.position + 1 < len(self.source) and self.source[self.position + 1].isalpha():
+                if (self.position + 1 < len(self.source)
+                        and _char_class(self.source[self.position + 1]) & _ALPHA):
                     self.tokens.append(self.read_identifier())
                 else:
                     token = self.read_operator()
@@ -204,7 +308,7 @@ class Lexer:
                         self.tokens.append(token)
                     else:
                         self.error(f"Unexpected character: {char}")
-            elif char and char in '~=&+|()[]{},:>@':
+            elif flags & _OPSTART:
                 token = self.read_operator()
                 if token:
                     self.tokens.append(token)
@@ -215,4 +319,66 @@ class Lexer:
         
         # Add EOF token
         self.tokens.append(Token(TokenType.EOF, None, self.line, self.column))
-        return self.tokens
\ No newline at end of file
+        return self.tokens
+    
+    def tokenize_regex(self) -> List[Token]:
+        """Tokenize in one scan with the compiled token pattern"""
+        source = self.source
+        end = len(source)
+        tokens: List[Token] = []
+        append = tokens.append
+        match = _TOKEN_RE.match
+        operators = _OPERATORS
+        keywords = _KEYWORDS
+        intern = sys.intern
+        line = self.line
+        line_start = self.position - (self.column - 1)
+        pos = self.position
+        
+        while pos < end:
+            m = match(source, pos)
+            if m is None:
+                self.position, self.line, self.column = pos, line, pos - line_start + 1
+                self.error(f"Unexpected character: {source[pos]}")
+            
+            kind = m.lastgroup
+            text = m.group()
+            column = pos - line_start + 1
+            
+            if kind == 'IDENT':
+                text = intern(text)
+                append(Token(keywords.get(text, TokenType.IDENTIFIER), text, line, column))
+            elif kind == 'OP':
+                append(Token(operators[text], text, line, column))
+            elif kind == 'NUMBER':
+                try:
+                    value = float(text) if '.' in text else int(text)
+                except ValueError:
+                    self.position, self.line, self.column = m.end(), line, m.end() - line_start + 1
+                    self.error(f"Invalid number: {text}")
+                append(Token(TokenType.NUMBER, value, line, column))
+            elif kind == 'STRING':
+                string = text[1:-1]
+                if '\\' in string:
+                    string = _ESCAPE_RE.sub(lambda e: _ESCAPES.get(e.group(1), e.group(1)), string)
+                append(Token(TokenType.STRING, string, line, column))
+            elif kind == 'UNTERMINATED':
+                newlines = source.count('\n', pos)
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind('\n') + 1
+                self.position, self.line, self.column = end, line, end - line_start + 1
+                self.error("Unterminated string")
+            
+            # Whitespace and strings may span lines
+            if kind == 'WS' or kind == 'STRING':
+                newlines = text.count('\n')
+                if newlines:
+                    line += newlines
+                    line_start = pos + text.rfind('\n') + 1
+            pos = m.end()
+        
+        self.position, self.line, self.column = pos, line, pos - line_start + 1
+        append(Token(TokenType.EOF, None, self.line, self.column))
+        self.tokens = tokens
+        return tokens
@@ -5,10 +5,26 @@ Supports sequential and parallel pipeline execution with timing
 
 import time
 import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from . import Lexer, Parser, Runtime
+from .ast_nodes import ProgramNode
 from .functions import _display_manager
 
+# Longest the main thread blocks between display pumps
+_DISPLAY_POLL_INTERVAL = 0.1
+
+
+@lru_cache(maxsize=128)
+def _compile(code: str) -> ProgramNode:
+    """Lex and parse pipeline code once per distinct source.
+
+    The runtime only reads the AST (stage params are copied into the
+    executable nodes), so the cached tree is safe to share between runs.
+    """
+    return Parser(Lexer(code).tokenize()).parse()
+
 
 class PipelineStep:
     """Represents a single pipeline step with timing"""
@@ -17,6 +33,7 @@ class PipelineStep:
         self.code = code.strip()
         self.duration = duration  # in seconds, None means run until stopped
         self.name = name or f"Pipeline_{id(self)}"
+        self.done_event = threading.Event()
 
 
 class MultiPipelineExecutor:
@@ -26,9 +43,37 @@ class MultiPipelineExecutor:
         self.sequential_pipelines: List[PipelineStep] = []
         self.parallel_pipelines: List[PipelineStep] = []
         self.running_pipelines: List[Dict] = []
-        self.stop_flag = False
+        self._stop_event = threading.Event()
         self._display_error_reported = False
 
+    @property
+    def stop_flag(self) -> bool:
+        return self._stop_event.is_set()
+
+    @stop_flag.setter
+    def stop_flag(self, value: bool):
+        if value:
+            self._stop_event.set()
+        else:
+            self._stop_event.clear()
+
+    def _wait_for(self, event: threading.Event, timeout: Optional[float] = None):
+        """Block until `event` is set, a stop is requested or `timeout` passes.
+
+        The display queue is still pumped between waits; the wait itself
+        wakes as soon as the event fires rather than on a sleep tick.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not event.is_set() and not self._stop_event.is_set():
+            if not self._pump_display():
+                break
+            wait_time = _DISPLAY_POLL_INTERVAL
+            if deadline is not None:
+                wait_time = min(wait_time, deadline - time.monotonic())
+                if wait_time <= 0:
+                    break
+            event.wait(wait_time)
+
     def _pump_display(self) -> bool:
         """Process queued display frames and react to user input."""
         try:
@@ -119,21 +164,15 @@ class MultiPipelineExecutor:
                 print("Running until stopped...")
 
             # Execute the pipeline
+            pipeline.done_event.clear()
             pipeline_thread = threading.Thread(target=self._execute_single_pipeline, args=(pipeline,))
             pipeline_thread.start()
 
             # Wait for duration or until stopped
             if pipeline.duration:
-                start_time = time.time()
-                while time.time() - start_time < pipeline.duration and not self.stop_flag:
-                    if not self._pump_display():
-                        break
-                    time.sleep(0.1)
+                self._wait_for(self._stop_event, pipeline.duration)
             else:
-                while pipeline_thread.is_alive() and not self.stop_flag:
-                    if not self._pump_display():
-                        break
-                    time.sleep(0.1)
+                self._wait_for(pipeline.done_event)
 
             # Stop the pipeline
             if pipeline_thread.is_alive():
@@ -149,24 +188,26 @@ class MultiPipelineExecutor:
         """Execute pipelines in parallel"""
         print(f"Executing {len(self.parallel_pipelines)} parallel pipelines...")
 
-        threads = []
-        for pipeline in self.parallel_pipelines:
-            if self.stop_flag:
-                break
+        # Parallel pipelines are usually endless streams, so each needs a
+        # worker of its own; a smaller pool would leave some never started
+        with ThreadPoolExecutor(max_workers=len(self.parallel_pipelines),
+                                thread_name_prefix="vidpipe-pipeline") as pool:
+            futures = []
+            for pipeline in self.parallel_pipelines:
+                if self.stop_flag:
+                    break
 
-            print(f"Starting parallel pipeline: {pipeline.name}")
-            thread = threading.Thread(target=self._execute_single_pipeline, args=(pipeline,))
-            thread.start()
-            threads.append(thread)
+                print(f"Starting parallel pipeline: {pipeline.name}")
+                futures.append(pool.submit(self._execute_single_pipeline, pipeline))
 
-        # Wait for all pipelines to complete or stop signal
-        while any(thread.is_alive() for thread in threads) and not self.stop_flag:
-            if not self._pump_display():
-                break
-            time.sleep(0.1)
+            # Wait for all pipelines to complete or stop signal
+            pending = set(futures)
+            while pending and not self.stop_flag:
+                if not self._pump_display():
+                    break
+                _, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
 
-        for thread in threads:
-            thread.join()
+            wait(futures)
 
         print("Parallel execution completed!")
 
@@ -198,12 +239,8 @@ class MultiPipelineExecutor:
             print(f"Executing pipeline: {pipeline.name}")
             print(f"Code: {pipeline.code[:50]}...")
 
-            # Parse and execute the pipeline
-            lexer = Lexer(pipeline.code)
-            tokens = lexer.tokenize()
-
-            parser = Parser(tokens)
-            ast = parser.parse()
+            # Parse (cached across replays) and execute the pipeline
+            ast = _compile(pipeline.code)
 
             runtime = Runtime()
             entry = {"runtime": runtime}
@@ -218,6 +255,8 @@ class MultiPipelineExecutor:
             print(f"Error in pipeline {pipeline.name}: {e}")
             import traceback
             traceback.print_exc()
+        finally:
+            pipeline.done_event.set()
 
 
 def execute_multi_pipeline_file(file_path: str):
@@ -2,54 +2,131 @@
 Parser for VidPipe language - builds AST from tokens
 """
 
-from typing import List, Optional, Dict, Any, Union
+from array import array
+from typing import List, NoReturn, Optional, Dict, Any, Tuple, Union
 from .tokens import Token, TokenType
-from .ast_nodes import *
+from .ast_nodes import (
+    ASTNode, ChoiceNode, FunctionNode, GroupNode, LoopNode, MergeNode,
+    ParallelNode, PipelineDefinitionNode, PipelineNode, PipelineReferenceNode,
+    PipelineType, ProgramNode, TimedPipelineNode,
+)
+
+
+# Token type codes; the parser compares these plain ints against a
+# precomputed array instead of going through Token.type Enum comparisons
+_SYNC_PIPE = TokenType.SYNC_PIPE.value
+_ASYNC_PIPE = TokenType.ASYNC_PIPE.value
+_BLOCKING_PIPE = TokenType.BLOCKING_PIPE.value
+_PARALLEL = TokenType.PARALLEL.value
+_MERGE = TokenType.MERGE.value
+_CHOICE = TokenType.CHOICE.value
+_LPAREN = TokenType.LPAREN.value
+_RPAREN = TokenType.RPAREN.value
+_LBRACKET = TokenType.LBRACKET.value
+_RBRACKET = TokenType.RBRACKET.value
+_LBRACE = TokenType.LBRACE.value
+_RBRACE = TokenType.RBRACE.value
+_IDENTIFIER = TokenType.IDENTIFIER.value
+_NUMBER = TokenType.NUMBER.value
+_STRING = TokenType.STRING.value
+_COMMA = TokenType.COMMA.value
+_COLON = TokenType.COLON.value
+_EOF = TokenType.EOF.value
+_WITH = TokenType.WITH.value
+_PIPELINE = TokenType.PIPELINE.value
+_AT = TokenType.AT.value
+_EQUALS = TokenType.EQUALS.value
+
+# Binding strength of the binary pipeline operators (higher binds tighter)
+_PIPE_PREC = 4
+_PRECEDENCE = {
+    _SYNC_PIPE: _PIPE_PREC,
+    _ASYNC_PIPE: _PIPE_PREC,
+    _BLOCKING_PIPE: _PIPE_PREC,
+    _PARALLEL: 3,
+    _CHOICE: 2,
+    _MERGE: 1,
+}
+
+_OPERAND_ERRORS = {
+    _SYNC_PIPE: "Expected expression after pipe operator",
+    _ASYNC_PIPE: "Expected expression after pipe operator",
+    _BLOCKING_PIPE: "Expected expression after pipe operator",
+    _PARALLEL: "Expected expression after parallel operator",
+    _CHOICE: "Expected expression after choice operator",
+    _MERGE: "Expected expression after merge operator",
+}
+
+# Tokens that open a parameter list after a function name, and tokens
+# that can stand as a parameter value
+_PARAMS_START = frozenset({_WITH, _LPAREN})
+_VALUE_TOKENS = frozenset({_NUMBER, _STRING, _IDENTIFIER})
+
+_PIPE_MAP = {
+    _SYNC_PIPE: PipelineType.SYNC,
+    _ASYNC_PIPE: PipelineType.ASYNC,
+    _BLOCKING_PIPE: PipelineType.BLOCKING,
+}
 
 
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    """Predictive parser: every decision is made on the current token alone.
+    
+    The grammar is LL(1), so the parser never backtracks and each token is
+    consumed exactly once; parsing is linear in the token count without any
+    packrat-style memo table. The token list must end with an EOF token, as
+    Lexer.tokenize() produces, so consuming any other token never runs past
+    the end.
+    
+    Fully annotated so the module can be compiled with mypyc unchanged.
+    """
+    
+    tokens: List[Token]
+    types: 'array[int]'
+    values: List[Any]
+    position: int
+    
+    def __init__(self, tokens: List[Token]) -> None:
         self.tokens = tokens
+        # TokenType members are ints, so they pack straight into the array
+        self.types = array('i', [token.type for token in tokens])
+        self.values = [token.value for token in tokens]
         self.position = 0
-        self.current_token = tokens[0] if tokens else None
     
-    def error(self, message: str):
+    @property
+    def current_token(self) -> Optional[Token]:
+        return self.tokens[self.position] if self.tokens else None
+    
+    def error(self, message: str) -> NoReturn:
         if self.current_token:
             raise SyntaxError(f"Parser error at line {self.current_token.line}, "
                             f"column {self.current_token.column}: {message}")
         else:
             raise SyntaxError(f"Parser error: {message}")
     
-    def peek(self, offset: int = 0) -> Optional[Token]:
-        pos = self.position + offset
-        if pos < len(self.tokens):
-            return self.tokens[pos]
-        return None
-    
     def advance(self) -> Token:
-        token = self.current_token
+        token = self.tokens[self.position]
         if self.position < len(self.tokens) - 1:
             self.position += 1
-            self.current_token = self.tokens[self.position]
         return token
     
     def expect(self, token_type: TokenType) -> Token:
-        if self.current_token and self.current_token.type == token_type:
+        if self.types[self.position] == token_type.value:
             return self.advance()
-        self.error(f"Expected {token_type.name}, got {self.current_token.type.name if self.current_token else 'EOF'}")
+        self.error(f"Expected {token_type.name}, got {self.tokens[self.position].type.name}")
     
     def parse(self) -> ProgramNode:
         """Parse the entire program"""
-        definitions = []
-        main_pipeline = None
+        definitions: List[PipelineDefinitionNode] = []
+        main_pipeline: Optional[ASTNode] = None
 
         # Handle empty program
-        if self.current_token.type == TokenType.EOF:
+        if self.types[self.position] == _EOF:
             return ProgramNode(definitions, main_pipeline)
 
         # Parse definitions and main pipeline
-        while self.current_token.type != TokenType.EOF:
-            if self.current_token.type == TokenType.PIPELINE:
+        while self.types[self.position] != _EOF:
+            if self.types[self.position] == _PIPELINE:
                 # Parse pipeline definition
                 definition = self.parse_pipeline_definition()
                 if definition:
@@ -62,198 +139,173 @@ class Parser:
                 break
 
         # Check for unexpected tokens
-        if self.current_token.type != TokenType.EOF:
-            self.error(f"Unexpected token: {self.current_token.value}")
+        if self.types[self.position] != _EOF:
+            self.error(f"Unexpected token: {self.values[self.position]}")
 
         return ProgramNode(definitions, main_pipeline)
     
     def parse_pipeline(self) -> Optional[ASTNode]:
         """Parse a complete pipeline expression"""
-        return self.parse_merge_expression()
-    
-    def parse_merge_expression(self) -> Optional[ASTNode]:
-        """Parse merge operations (+>)"""
-        left = self.parse_choice_expression()
-        
-        if not left:
-            return None
-        
-        # Check for merge operator
-        if self.current_token and self.current_token.type == TokenType.MERGE:
-            inputs = [left]
-            
-            # Collect all inputs before merge
-            while self.peek() and self.peek().type != TokenType.MERGE:
-                expr = self.parse_choice_expression()
-                if expr:
-                    inputs.append(expr)
-            
-            self.expect(TokenType.MERGE)
-            output = self.parse_choice_expression()
-            
-            if not output:
-                self.error("Expected expression after merge operator")
-            
-            return MergeNode(inputs, output)
-        
-        return left
+        return self.parse_expression(0)
     
-    def parse_choice_expression(self) -> Optional[ASTNode]:
-        """Parse choice operations (|)"""
-        left = self.parse_parallel_expression()
-        
-        if not left:
-            return None
+    def parse_expression(self, min_prec: int) -> Optional[ASTNode]:
+        """Precedence-climbing parse of binary operators binding at least `min_prec`.
         
-        options = [left]
+        Pipes (->, ~>, =>) bind tightest and associate left, then parallel
+        (&>) and choice (|), which collect their operands into one n-ary
+        node, and finally merge (+>), which takes a single output and ends
+        the expression. A `min_prec` above the pipes parses one primary.
         
-        while self.current_token and self.current_token.type == TokenType.CHOICE:
-            self.advance()
-            right = self.parse_parallel_expression()
-            if not right:
-                self.error("Expected expression after choice operator")
-            options.append(right)
+        Groups, loops and the operands of looser operators are not parsed
+        by recursion: the expression being built is suspended on an explicit
+        stack and resumed once the nested one is complete, so nesting depth
+        costs no Python stack.
+        """
+        types = self.types
+        precedence = _PRECEDENCE
+        pipe_map = _PIPE_MAP
+        # Suspended expressions: (min_prec, left, last_op, operands, op, closer)
+        stack: List[Tuple[int, Optional[ASTNode], int, List[ASTNode], int, int]] = []
+        # State of the expression being built: `op` is the operator whose
+        # right operand comes next (-1 before the first primary) and
+        # `closer` the token ending a group or loop (-1 for none)
+        left: Optional[ASTNode] = None
+        last_op = -1
+        operands: List[ASTNode] = []
+        op = -1
+        closer = -1
+        # Error raised when the next primary is missing; None lets the
+        # outermost expression report that there is none
+        missing: Optional[str] = None
         
-        if len(options) > 1:
-            return ChoiceNode(options)
-        
-        return left
+        while True:
+            # Parse the next primary, opening a nested expression for a group or loop
+            t = types[self.position]
+            if t == _IDENTIFIER:
+                value: ASTNode = self.parse_function()
+                # Check for timing operator (@ duration)
+                if types[self.position] == _AT:
+                    self.position += 1  # consume @
+                    value = TimedPipelineNode(value, self.parse_duration())
+            elif t == _LPAREN or t == _LBRACE:
+                self.position += 1
+                stack.append((min_prec, left, last_op, operands, op, closer))
+                min_prec, left, last_op, operands, op = 0, None, -1, [], -1
+                if t == _LPAREN:
+                    closer, missing = _RPAREN, "Expected pipeline inside parentheses"
+                else:
+                    closer, missing = _RBRACE, "Expected pipeline inside loop"
+                continue
+            elif t == _LBRACKET:
+                self.parse_buffer_spec()
+                missing = "Expected expression after buffered pipe"
+                continue
+            elif missing is None:
+                return None
+            else:
+                self.error(missing)
+            
+            # Fold the primary in and apply operators until one needs an operand
+            while True:
+                finished = False
+                if op < 0:
+                    left = value
+                else:
+                    assert left is not None
+                    pipe_type = pipe_map.get(op)
+                    if pipe_type is not None:
+                        left = PipelineNode(left, value, pipe_type)
+                    elif op == _MERGE:
+                        left = MergeNode([left], value)
+                        finished = True
+                    elif op == last_op:
+                        # Same n-ary operator again: extend the node built for it
+                        operands.append(value)
+                    elif op == _PARALLEL:
+                        operands = [left, value]
+                        left = ParallelNode(operands)
+                    else:
+                        operands = [left, value]
+                        left = ChoiceNode(operands)
+                    last_op = op
+                
+                if not finished:
+                    op = types[self.position]
+                    prec = precedence.get(op, -1)
+                    if prec >= min_prec:
+                        self.position += 1
+                        missing = _OPERAND_ERRORS[op]
+                        if prec != _PIPE_PREC:
+                            # Looser operators take a whole tighter-binding expression
+                            stack.append((min_prec, left, last_op, operands, op, closer))
+                            min_prec, left, last_op, operands, op, closer = prec + 1, None, -1, [], -1, -1
+                        break
+                
+                # This expression is complete
+                assert left is not None
+                value = left
+                if closer >= 0:
+                    if types[self.position] != closer:
+                        self.expect(TokenType.RPAREN if closer == _RPAREN else TokenType.RBRACE)
+                    self.position += 1
+                    value = GroupNode(value) if closer == _RPAREN else LoopNode(value)
+                if not stack:
+                    return value
+                min_prec, left, last_op, operands, op, closer = stack.pop()
     
-    def parse_parallel_expression(self) -> Optional[ASTNode]:
-        """Parse parallel operations (&>)"""
-        left = self.parse_pipe_expression()
-        
-        if not left:
-            return None
-        
-        branches = [left]
-        
-        while self.current_token and self.current_token.type == TokenType.PARALLEL:
-            self.advance()
-            right = self.parse_pipe_expression()
-            if not right:
-                self.error("Expected expression after parallel operator")
-            branches.append(right)
-        
-        if len(branches) > 1:
-            return ParallelNode(branches)
-        
-        return left
+    def parse_primary(self) -> Optional[ASTNode]:
+        """Parse primary expressions (functions, groups, loops)"""
+        return self.parse_expression(_PIPE_PREC + 1)
     
-    def parse_pipe_expression(self) -> Optional[ASTNode]:
-        """Parse pipe operations (->, ~>, =>, [n]->)"""
-        left = self.parse_primary()
+    def parse_buffer_spec(self) -> int:
+        """Consume a buffered pipe prefix `[n] ->` and return the buffer size.
         
-        if not left:
-            return None
+        The size is not carried into the AST yet; the primary that follows
+        stands for the whole buffered pipe.
+        """
+        self.position += 1
         
-        while self.current_token and self.current_token.type in [
-            TokenType.SYNC_PIPE, TokenType.ASYNC_PIPE, TokenType.BLOCKING_PIPE
-        ]:
-            pipe_type = {
-                TokenType.SYNC_PIPE: PipelineType.SYNC,
-                TokenType.ASYNC_PIPE: PipelineType.ASYNC,
-                TokenType.BLOCKING_PIPE: PipelineType.BLOCKING
-            }[self.current_token.type]
-            
-            self.advance()
-            right = self.parse_primary()
-            
-            if not right:
-                self.error("Expected expression after pipe operator")
-            
-            left = PipelineNode(left, right, pipe_type)
+        if self.types[self.position] != _NUMBER:
+            self.error("Expected number for buffer size")
         
-        return left
-    
-    def parse_primary(self) -> Optional[ASTNode]:
-        """Parse primary expressions (functions, groups, loops)"""
+        buffer_size = int(self.values[self.position])
+        self.position += 1
         
-        # Check for buffered pipe [n]
-        if self.current_token and self.current_token.type == TokenType.LBRACKET:
-            self.advance()
-            
-            if self.current_token.type != TokenType.NUMBER:
-                self.error("Expected number for buffer size")
-            
-            buffer_size = int(self.current_token.value)
-            self.advance()
-            
+        if self.types[self.position] != _RBRACKET:
             self.expect(TokenType.RBRACKET)
-            
-            # Must be followed by pipe operator
-            if self.current_token.type != TokenType.SYNC_PIPE:
-                self.error("Expected -> after buffer specification")
-            
-            self.advance()
-            right = self.parse_primary()
-            
-            if not right:
-                self.error("Expected expression after buffered pipe")
-            
-            # Create a special buffered pipeline node
-            # We'll handle this by returning a partial pipeline that needs a left side
-            # This is a bit tricky - we need to restructure parsing for this
-            # For now, we'll handle it differently
-            return right  # Simplified for now
+        self.position += 1
         
-        # Loop construct {pipeline}
-        if self.current_token and self.current_token.type == TokenType.LBRACE:
-            self.advance()
-            pipeline = self.parse_pipeline()
-            if not pipeline:
-                self.error("Expected pipeline inside loop")
-            self.expect(TokenType.RBRACE)
-            return LoopNode(pipeline)
+        # Must be followed by pipe operator
+        if self.types[self.position] != _SYNC_PIPE:
+            self.error("Expected -> after buffer specification")
         
-        # Grouped expression (pipeline)
-        if self.current_token and self.current_token.type == TokenType.LPAREN:
-            self.advance()
-            pipeline = self.parse_pipeline()
-            if not pipeline:
-                self.error("Expected pipeline inside parentheses")
-            self.expect(TokenType.RPAREN)
-            return GroupNode(pipeline)
-        
-        # Function call or pipeline reference
-        if self.current_token and self.current_token.type == TokenType.IDENTIFIER:
-            node = self.parse_function()
-
-            # Check for timing operator (@ duration)
-            if self.current_token and self.current_token.type == TokenType.AT:
-                self.advance()  # consume @
-                duration = self.parse_duration()
-                node = TimedPipelineNode(node, duration)
-
-            return node
-
-        return None
+        self.position += 1
+        return buffer_size
     
     def parse_function(self) -> Union[FunctionNode, PipelineReferenceNode]:
         """Parse a function call, pipeline reference, or definition reference"""
-        if self.current_token.type != TokenType.IDENTIFIER:
+        if self.types[self.position] != _IDENTIFIER:
             self.error("Expected function name or pipeline reference")
 
-        name = self.current_token.value
-        self.advance()
+        name = self.values[self.position]
+        self.position += 1
 
         # Check if this is a function call (has parameters) or just a reference
-        if self.current_token and (
-            self.current_token.type == TokenType.WITH or
-            self.current_token.type == TokenType.LPAREN
-        ):
+        if self.types[self.position] in _PARAMS_START:
             # This is a function call with parameters
             params = {}
 
             # Check for 'with' keyword for parameters
-            if self.current_token.type == TokenType.WITH:
-                self.advance()
+            if self.types[self.position] == _WITH:
+                self.position += 1
                 params = self.parse_parameters()
             # Check for direct parentheses (alternative syntax)
-            elif self.current_token.type == TokenType.LPAREN:
-                self.advance()
+            elif self.types[self.position] == _LPAREN:
+                self.position += 1
                 params = self.parse_parameter_list()
-                self.expect(TokenType.RPAREN)
+                if self.types[self.position] != _RPAREN:
+                    self.expect(TokenType.RPAREN)
+                self.position += 1
 
             return FunctionNode(name, params)
         else:
@@ -265,30 +317,32 @@ class Parser:
         params = {}
 
         # Support both key:value and positional parameters
-        if self.current_token and self.current_token.type == TokenType.LPAREN:
-            self.advance()  # consume opening parenthesis
+        if self.types[self.position] == _LPAREN:
+            self.position += 1  # consume opening parenthesis
             params = self.parse_parameter_list()
-            self.expect(TokenType.RPAREN)
+            if self.types[self.position] != _RPAREN:
+                self.expect(TokenType.RPAREN)
+            self.position += 1
 
         return params
 
     def parse_pipeline_definition(self) -> Optional[PipelineDefinitionNode]:
         """Parse a pipeline definition: pipeline name = expression"""
         # Consume 'pipeline' keyword
-        self.advance()
+        self.position += 1
 
         # Expect identifier for pipeline name
-        if self.current_token.type != TokenType.IDENTIFIER:
+        if self.types[self.position] != _IDENTIFIER:
             self.error("Expected pipeline name after 'pipeline'")
 
-        name = self.current_token.value
-        self.advance()
+        name = self.values[self.position]
+        self.position += 1
 
         # Expect '='
-        if self.current_token.type != TokenType.EQUALS:
+        if self.types[self.position] != _EQUALS:
             self.error("Expected '=' after pipeline name")
 
-        self.advance()
+        self.position += 1
 
         # Parse the pipeline expression
         expression = self.parse_pipeline()
@@ -299,15 +353,15 @@ class Parser:
 
     def parse_duration(self) -> float:
         """Parse duration value (number followed by 's')"""
-        if self.current_token.type != TokenType.NUMBER:
+        if self.types[self.position] != _NUMBER:
             self.error("Expected number for duration")
 
-        duration = float(self.current_token.value)
-        self.advance()
+        duration = float(self.values[self.position])
+        self.position += 1
 
         # Check for 's' suffix (optional for now)
-        if self.current_token and self.current_token.type == TokenType.IDENTIFIER and self.current_token.value == 's':
-            self.advance()
+        if self.types[self.position] == _IDENTIFIER and self.values[self.position] == 's':
+            self.position += 1
 
         return duration
 
@@ -316,13 +370,12 @@ class Parser:
         params = {}
         param_index = 0
         
-        while self.current_token and self.current_token.type != TokenType.RPAREN:
+        while self.types[self.position] != _RPAREN:
             # Check for key:value syntax
-            if self.current_token.type == TokenType.IDENTIFIER and \
-               self.peek(1) and self.peek(1).type == TokenType.COLON:
-                key = self.current_token.value
-                self.advance()  # identifier
-                self.advance()  # colon
+            if self.types[self.position] == _IDENTIFIER and \
+               self.position + 1 < len(self.types) and self.types[self.position + 1] == _COLON:
+                key = self.values[self.position]
+                self.position += 2  # identifier and colon
                 value = self.parse_value()
                 params[key] = value
             else:
@@ -332,30 +385,22 @@ class Parser:
                 param_index += 1
 
             # Check for comma or end of list
-            if self.current_token and self.current_token.type == TokenType.COMMA:
-                self.advance()  # consume comma, continue parsing
-            elif self.current_token and self.current_token.type == TokenType.RPAREN:
+            if self.types[self.position] == _COMMA:
+                self.position += 1  # consume comma, continue parsing
+            elif self.types[self.position] == _RPAREN:
                 # End of parameter list, we're done
                 break
             else:
                 # Unexpected token
-                self.error(f"Expected comma or closing parenthesis, got {self.current_token.type.name}")
+                self.error(f"Expected comma or closing parenthesis, got {self.tokens[self.position].type.name}")
         
         return params
     
     def parse_value(self) -> Any:
         """Parse a parameter value"""
-        if self.current_token.type == TokenType.NUMBER:
-            value = self.current_token.value
-            self.advance()
-            return value
-        elif self.current_token.type == TokenType.STRING:
-            value = self.current_token.value
-            self.advance()
-            return value
-        elif self.current_token.type == TokenType.IDENTIFIER:
-            value = self.current_token.value
-            self.advance()
+        if self.types[self.position] in _VALUE_TOKENS:
+            value = self.values[self.position]
+            self.position += 1
             return value
         else:
-            self.error(f"Expected value, got {self.current_token.type.name}")
\ No newline at end of file
+            self.error(f"Expected value, got {self.tokens[self.position].type.name}")
\ No newline at end of file
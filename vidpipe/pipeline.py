@@ -5,11 +5,13 @@ Pipeline execution model with async support
 import asyncio
 import numpy as np
 from typing import Any, Optional, Dict, List, Callable
-from dataclasses import dataclass
 from enum import Enum
 import time
-from collections import deque
+from collections import defaultdict, deque
+from functools import partial
 import threading
+import weakref
+from queue import Empty, SimpleQueue
 from concurrent.futures import ThreadPoolExecutor
 
 
@@ -20,24 +22,45 @@ class FrameFormat(Enum):
     RGBA = "rgba"
 
 
-@dataclass
 class Frame:
-    """Represents a video frame"""
-    data: np.ndarray
-    format: FrameFormat
-    width: int
-    height: int
-    timestamp: float
-    metadata: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+    """Represents a video frame.
+    
+    A plain class with __slots__ rather than a dataclass: frames are created
+    for every stage of every frame, and slots keep each one small without
+    needing Python 3.10's dataclass(slots=True).
+    """
+    
+    __slots__ = ("data", "format", "width", "height", "timestamp", "metadata")
+    
+    def __init__(self, data: np.ndarray, format: FrameFormat, width: int, height: int,
+                 timestamp: float, metadata: Optional[Dict[str, Any]] = None):
+        self.data = data
+        self.format = format
+        self.width = width
+        self.height = height
+        self.timestamp = timestamp
+        self.metadata = {} if metadata is None else metadata
+        # Strided views (crops, channel slices) would push every later copy
+        # and ufunc onto numpy's generic strided loops
+        if isinstance(self.data, np.ndarray) and not self.data.flags.c_contiguous:
+            self.data = np.ascontiguousarray(self.data)
+    
+    def __repr__(self) -> str:
+        return (f"Frame(data={self.data!r}, format={self.format!r}, width={self.width!r}, "
+                f"height={self.height!r}, timestamp={self.timestamp!r}, metadata={self.metadata!r})")
+    
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.data, self.format, self.width, self.height, self.timestamp, self.metadata)
+                == (other.data, other.format, other.width, other.height, other.timestamp, other.metadata))
     
     def copy(self) -> 'Frame':
-        """Create a deep copy of the frame"""
+        """Create a deep copy of the frame in a pooled buffer"""
+        data = FRAME_POOL.acquire(self.data.shape, self.data.dtype)
+        np.copyto(data, self.data)
         return Frame(
-            data=self.data.copy(),
+            data=data,
             format=self.format,
             width=self.width,
             height=self.height,
@@ -45,66 +68,220 @@ class Frame:
             metadata=self.metadata.copy()
         )
     
+    def share(self) -> 'Frame':
+        """Create a frame viewing the same buffer, which becomes read-only.
+        
+        Consumers that need to write call cow_mutate() for a private copy.
+        """
+        self.data.flags.writeable = False
+        return Frame(
+            data=self.data,
+            format=self.format,
+            width=self.width,
+            height=self.height,
+            timestamp=self.timestamp,
+            metadata=self.metadata.copy()
+        )
+    
+    def cow_mutate(self) -> np.ndarray:
+        """Make the buffer writable, copying it first if it is shared read-only"""
+        if not self.data.flags.writeable:
+            data = FRAME_POOL.acquire(self.data.shape, self.data.dtype)
+            np.copyto(data, self.data)
+            self.data = data
+        return self.data
+    
+    def to_device(self, stream=None):
+        """Upload the frame's data to the GPU as a numba.cuda device array.
+        
+        The data is staged through a per-thread page-locked host buffer, so
+        the upload is a straight DMA, and with a ``stream`` it is queued
+        asynchronously while the caller carries on. That buffer is reused on
+        the thread's next upload, so synchronise ``stream`` before then.
+        """
+        from numba import cuda
+        
+        staging = _pinned_local.__dict__.get("staging")
+        if staging is None or staging.shape != self.data.shape or staging.dtype != self.data.dtype:
+            staging = _pinned_local.staging = cuda.pinned_array(self.data.shape, dtype=self.data.dtype)
+        np.copyto(staging, self.data)
+        return cuda.to_device(staging, stream=stream or 0)
+    
+    @property
+    def dtype(self) -> np.dtype:
+        return self.data.dtype
+    
     @property
     def channels(self) -> int:
-        if self.format == FrameFormat.GRAY:
+        if self.format is FrameFormat.GRAY:
             return 1
-        elif self.format == FrameFormat.RGB or self.format == FrameFormat.BGR:
+        elif self.format is FrameFormat.RGB or self.format is FrameFormat.BGR:
             return 3
-        elif self.format == FrameFormat.RGBA:
+        elif self.format is FrameFormat.RGBA:
             return 4
         return 3
 
 
+# Page-locked staging buffers for Frame.to_device, one per thread
+_pinned_local = threading.local()
+
+
+class FramePool:
+    """Recycles frame-sized buffers keyed by shape and dtype.
+    
+    The pool keeps every buffer it hands out. acquire() returns an array
+    over that buffer through a memoryview, and the array and every view
+    taken from it keep the memoryview alive. The buffer goes back on the
+    free list when the memoryview is finalised, that is once nothing can
+    reach the memory any more. Ownership therefore follows the objects
+    themselves, not ids or reference counts, so a recycled buffer is never
+    visible through two frames at once.
+    """
+    
+    def __init__(self, per_key: int = 4):
+        self.per_key = per_key
+        self.free: Dict[tuple, deque] = defaultdict(deque)
+        # Reentrant: a garbage collection inside acquire() may finalise a
+        # pooled array and reclaim its buffer on the same thread
+        self.lock = threading.RLock()
+    
+    def acquire(self, shape: tuple, dtype=np.uint8) -> np.ndarray:
+        """Get an uninitialised array, reusing a reclaimed buffer when available"""
+        key = (tuple(shape), np.dtype(dtype))
+        with self.lock:
+            free = self.free.get(key)
+            buffer = free.pop() if free else None
+        if buffer is None:
+            buffer = np.empty(key[0], dtype=key[1])
+        arr = np.asarray(buffer.data)
+        weakref.finalize(arr.base, self._reclaim, key, buffer).atexit = False
+        return arr
+    
+    def _reclaim(self, key: tuple, buffer: np.ndarray):
+        with self.lock:
+            free = self.free[key]
+            if len(free) < self.per_key:
+                free.append(buffer)
+
+
+FRAME_POOL = FramePool()
+
+
+_CLOSED = object()
+
+
 class Queue:
-    """Thread-safe queue for frame passing"""
+    """Thread-safe queue for frame passing.
+    
+    Items travel through a C-level queue.SimpleQueue. A bounded queue keeps
+    its free slots as tokens in a second SimpleQueue, so put blocks on an
+    empty slot queue for backpressure and get never takes a Python-level
+    lock. Closing enqueues a sentinel that every later get sees once the
+    remaining items have been drained, and frees a slot for a producer
+    blocked on a full queue, so nothing needs to poll. A put that loses the
+    race with close raises instead of landing behind the sentinel.
+    """
     
     def __init__(self, maxsize: int = 0):
-        self.queue = deque()
+        self.items = SimpleQueue()
         self.maxsize = maxsize
-        self.lock = threading.Lock()
-        self.not_empty = threading.Condition(self.lock)
-        self.not_full = threading.Condition(self.lock)
+        self.slots: Optional[SimpleQueue] = None
+        if maxsize > 0:
+            self.slots = SimpleQueue()
+            for _ in range(maxsize):
+                self.slots.put(None)
         self.closed = False
+        # Orders put's closed check and enqueue against close's sentinel
+        self.close_lock = threading.Lock()
     
     def put(self, item: Any, timeout: Optional[float] = None):
         """Put an item in the queue"""
-        with self.lock:
-            if self.closed:
-                raise RuntimeError("Queue is closed")
-            
-            while self.maxsize > 0 and len(self.queue) >= self.maxsize:
-                if not self.not_full.wait(timeout):
-                    raise TimeoutError("Queue put timed out")
-            
-            self.queue.append(item)
-            self.not_empty.notify()
+        if self.closed:
+            raise RuntimeError("Queue is closed")
+        if self.slots is not None:
+            try:
+                self.slots.get(timeout=timeout)
+            except Empty:
+                raise TimeoutError("Queue put timed out") from None
+        with self.close_lock:
+            if not self.closed:
+                self.items.put(item)
+                return
+        if self.slots is not None:
+            # Pass the slot on so every other blocked producer wakes too
+            self.slots.put(None)
+        raise RuntimeError("Queue is closed")
     
     def get(self, timeout: Optional[float] = None):
         """Get an item from the queue"""
-        with self.lock:
-            while not self.queue and not self.closed:
-                if not self.not_empty.wait(timeout):
-                    raise TimeoutError("Queue get timed out")
-            
-            if self.closed and not self.queue:
-                return None
-            
-            item = self.queue.popleft()
-            self.not_full.notify()
-            return item
+        try:
+            item = self.items.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError("Queue get timed out") from None
+        
+        if item is _CLOSED:
+            # Leave the sentinel for any later get
+            self.items.put(_CLOSED)
+            return None
+        
+        if self.slots is not None:
+            self.slots.put(None)
+        return item
     
     def close(self):
         """Close the queue"""
-        with self.lock:
+        with self.close_lock:
+            if self.closed:
+                return
             self.closed = True
-            self.not_empty.notify_all()
-            self.not_full.notify_all()
+            self.items.put(_CLOSED)
+        if self.slots is not None:
+            self.slots.put(None)
     
     def qsize(self) -> int:
         """Get queue size"""
-        with self.lock:
-            return len(self.queue)
+        return max(self.items.qsize() - self.closed, 0)
+
+
+def cast_frame(frame: Frame, dtype=np.uint8, **kwargs) -> Frame:
+    """Convert a frame's data to ``dtype``, rounding and saturating into an
+    integer type's range. Frames that already have the dtype pass through."""
+    dtype = np.dtype(dtype)
+    if frame.data.dtype == dtype:
+        return frame
+    
+    source = frame.data
+    if dtype.kind in "ui":
+        info = np.iinfo(dtype)
+        if source.dtype.kind == "f":
+            source = np.rint(source)
+        source = np.clip(source, info.min, info.max)
+    data = FRAME_POOL.acquire(frame.data.shape, dtype)
+    np.copyto(data, source, casting="unsafe")
+    
+    return Frame(
+        data=data,
+        format=frame.format,
+        width=frame.width,
+        height=frame.height,
+        timestamp=frame.timestamp,
+        metadata=frame.metadata.copy()
+    )
+
+
+def bind_params(function: Callable, params: Dict[str, Any]) -> Callable:
+    """Bind a stage's parameters once so the per-frame call is a single positional call"""
+    return partial(function, **params) if params else function
+
+
+def cast_input(call: Callable, dtype) -> Callable:
+    """Wrap a stage call so its input frames are cast to ``dtype`` first"""
+    dtype = np.dtype(dtype)
+    
+    def cast_then_call(frame):
+        return call(cast_frame(frame, dtype))
+    
+    return cast_then_call
 
 
 class PipelineNode:
@@ -120,6 +297,12 @@ class PipelineNode:
         self.thread: Optional[threading.Thread] = None
         self.is_source = False
         self.is_sink = False
+        # The dtype the function needs its input frames in, if it is picky
+        self.accepts_dtype: Optional[np.dtype] = None
+        # False keeps the node out of fused chains, so it keeps its name
+        self.fusable = True
+        # Called from the node's thread once run() has finished
+        self.on_finished: Optional[Callable[[], None]] = None
     
     def add_output(self, queue: Queue):
         """Add an output queue"""
@@ -129,54 +312,138 @@ class PipelineNode:
         """Set the input queue"""
         self.input_queue = queue
     
+    def stage_call(self) -> Callable:
+        """The per-frame call: parameters bound once, and input frames cast
+        first when the function needs one dtype"""
+        call = bind_params(self.function, self.params)
+        if self.accepts_dtype is not None and not self.is_source:
+            call = cast_input(call, self.accepts_dtype)
+        return call
+    
     def run(self):
         """Main execution loop for the node"""
         self.running = True
+        call = self.stage_call()
+        # Pick the role's loop once so the per-frame loops never re-check it
+        if self.is_source:
+            loop = self._run_source
+        elif self.is_sink:
+            loop = self._run_sink
+        else:
+            loop = self._run_transform
         
         try:
-            if self.is_source:
-                # Source node - generates frames
-                while self.running:
-                    frame = self.function(None, **self.params)
-                    if frame is None:
-                        break
-                    
-                    for queue in self.output_queues:
-                        queue.put(frame.copy() if len(self.output_queues) > 1 else frame)
+            loop(call)
+        
+        except Exception as e:
+            # Puts into queues closed by Pipeline.stop() are expected once stopped
+            if self.running:
+                print(f"Error in node {self.name}: {e}")
+        
+        finally:
+            # Signal downstream nodes that we're done
+            for queue in self.output_queues:
+                queue.close()
+            if self.on_finished is not None:
+                self.on_finished()
+    
+    def _run_source(self, call: Callable):
+        """Generate frames until the source runs dry"""
+        emit = self.emit
+        while self.running:
+            frame = call(None)
+            if frame is None:
+                break
+            
+            emit(frame)
+            frame = None
+    
+    def _run_sink(self, call: Callable):
+        """Consume frames until the input closes or the sink asks to stop"""
+        get = self.input_queue.get
+        while self.running:
+            frame = get()
+            if frame is None:
+                break
             
-            elif self.is_sink:
-                # Sink node - consumes frames
-                while self.running:
-                    frame = self.input_queue.get(timeout=1.0)
+            result = call(frame)
+            frame = None
+            # Check if sink wants to stop (e.g., user pressed 'q')
+            if result is False:
+                self.running = False
+                break
+    
+    def _run_transform(self, call: Callable):
+        """Transform frames until the input closes"""
+        get = self.input_queue.get
+        emit = self.emit
+        while self.running:
+            frame = get()
+            if frame is None:
+                break
+            
+            result = call(frame)
+            # Drop our references while waiting for the next frame so
+            # consumed buffers go back to the pool straight away
+            frame = None
+            
+            if result is not None:
+                emit(result)
+                result = None
+    
+    async def run_async(self, executor: ThreadPoolExecutor, queues: Dict[Queue, asyncio.Queue]):
+        """Coroutine counterpart of run() for the asyncio scheduler.
+        
+        The node waits on asyncio queues on the pipeline's event loop and
+        only hands the stage call itself to the executor, so a node holds a
+        worker thread just while it is processing a frame. ``queues`` maps
+        each of the pipeline's queues to its asyncio stand-in.
+        """
+        self.running = True
+        input_queue = queues.get(self.input_queue)
+        loop = asyncio.get_running_loop()
+        call = self.stage_call()
+        
+        try:
+            while self.running:
+                frame = None
+                if not self.is_source:
+                    frame = await input_queue.get()
                     if frame is None:
                         break
-
-                    result = self.function(frame, **self.params)
-                    # Check if sink wants to stop (e.g., user pressed 'q')
+                
+                result = await loop.run_in_executor(executor, call, frame)
+                frame = None
+                
+                if self.is_source and result is None:
+                    break
+                if self.is_sink:
                     if result is False:
                         self.running = False
                         break
-            
-            else:
-                # Processing node - transforms frames
-                while self.running:
-                    frame = self.input_queue.get(timeout=1.0)
-                    if frame is None:
-                        break
-                    
-                    result = self.function(frame, **self.params)
-                    
-                    if result is not None:
-                        for queue in self.output_queues:
-                            queue.put(result.copy() if len(self.output_queues) > 1 else result)
+                elif result is not None:
+                    for queue, item in self.deliveries(result):
+                        await queues[queue].put(item)
+                    result = None
         
         except Exception as e:
             print(f"Error in node {self.name}: {e}")
         
-        finally:
-            # Signal downstream nodes that we're done
-            for queue in self.output_queues:
-                queue.close()
+        # Signal downstream nodes that we're done; a cancelled node skips
+        # this because stop() cancels every node at once
+        for queue in self.output_queues:
+            await queues[queue].put(None)
+    
+    def deliveries(self, result: Frame) -> List[tuple]:
+        """Pair each output queue with its frame, sharing the buffer read-only on a fan-out"""
+        if len(self.output_queues) == 1:
+            return [(self.output_queues[0], result)]
+        return [(queue, result.share()) for queue in self.output_queues]
+    
+    def emit(self, result: Frame):
+        """Send a result downstream, sharing its buffer read-only when the output fans out"""
+        for queue, item in self.deliveries(result):
+            queue.put(item)
     
     def start(self):
         """Start the node execution in a separate thread"""
@@ -191,18 +458,90 @@ class PipelineNode:
             self.thread.join(timeout=2.0)
 
 
+class BranchBatchNode(PipelineNode):
+    """Runs sibling branches concurrently on the same input frame.
+    
+    The first branch runs on the node's own thread and the rest on a small
+    pool, so OpenCV-bound siblings overlap while the GIL is released.
+    Results are emitted in branch order.
+    """
+    
+    def __init__(self, name: str, branches: List[Callable]):
+        super().__init__(name, self.run_branches)
+        self.branches = branches
+        self.executor: Optional[ThreadPoolExecutor] = None
+    
+    def run_branches(self, frame: Frame) -> List[Frame]:
+        head, rest = self.branches[0], self.branches[1:]
+        if rest:
+            # Siblings read the frame concurrently, so none may write it in place
+            frame.data.flags.writeable = False
+        futures = [self.executor.submit(branch, frame) for branch in rest]
+        return [head(frame)] + [future.result() for future in futures]
+    
+    def deliveries(self, results: List[Frame]) -> List[tuple]:
+        deliver = super().deliveries
+        return [delivery for result in results if result is not None
+                for delivery in deliver(result)]
+    
+    def run(self):
+        self.executor = self._branch_executor()
+        try:
+            super().run()
+        finally:
+            self.executor.shutdown(wait=True)
+    
+    async def run_async(self, executor, queues):
+        self.executor = self._branch_executor()
+        try:
+            await super().run_async(executor, queues)
+        finally:
+            self.executor.shutdown(wait=False)
+    
+    def _branch_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=max(len(self.branches) - 1, 1),
+            thread_name_prefix=f"Node-{self.name}"
+        )
+
+
 class Pipeline:
-    """Manages the execution of a complete pipeline"""
+    """Manages the execution of a complete pipeline.
+    
+    With the default "threads" scheduler every node runs on its own thread.
+    The "asyncio" scheduler runs all nodes as coroutines on one event loop
+    thread and hands only the stage calls to a shared worker pool.
+    """
     
-    def __init__(self):
+    SCHEDULERS = ("threads", "asyncio")
+    
+    def __init__(self, scheduler: str = "threads"):
+        if scheduler not in self.SCHEDULERS:
+            raise ValueError(f"Unknown scheduler: {scheduler}")
         self.nodes: List[PipelineNode] = []
         self.connections: List[tuple] = []
+        self.async_queues = set()
         self.running = False
+        self.scheduler = scheduler
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[threading.Thread] = None
+        self.tasks: List[asyncio.Task] = []
+        # Set once every node has finished
+        self.done_event = threading.Event()
+        self._live_nodes = 0
+        self._live_lock = threading.Lock()
     
     def add_node(self, node: PipelineNode):
         """Add a node to the pipeline"""
         self.nodes.append(node)
     
+    def build(self, nodes: List[PipelineNode], edges: List[tuple]):
+        """Add a batch of nodes and connect ``(source, target, buffer_size,
+        async_mode)`` edges between them"""
+        self.nodes.extend(nodes)
+        for source, target, buffer_size, async_mode in edges:
+            self.connect(source, target, buffer_size, async_mode)
+    
     def connect(self, source: PipelineNode, target: PipelineNode, 
                 buffer_size: int = 10, async_mode: bool = False):
         """Connect two nodes with a queue"""
@@ -210,25 +549,191 @@ class Pipeline:
         source.add_output(queue)
         target.set_input(queue)
         self.connections.append((source, target, queue))
+        if async_mode:
+            self.async_queues.add(queue)
+    
+    def fuse_chain(self, chain: List[PipelineNode], name: str) -> PipelineNode:
+        """Replace a linear chain of transform nodes with one node.
+        
+        The fused node runs each stage's function in order on the same
+        thread, so intermediate frames never pass through a queue.
+        """
+        stages = [node.stage_call() for node in chain]
+        
+        def fused(frame, **kwargs):
+            for stage in stages:
+                frame = stage(frame)
+                if frame is None:
+                    break
+            return frame
+        
+        head, tail = chain[0], chain[-1]
+        node = PipelineNode(name, fused)
+        node.input_queue = head.input_queue
+        node.output_queues = tail.output_queues
+        
+        members = set(chain)
+        connections = []
+        for source, target, queue in self.connections:
+            if source in members and target in members:
+                continue
+            connections.append((
+                node if source is tail else source,
+                node if target is head else target,
+                queue
+            ))
+        self.connections = connections
+        self.nodes = [node if n is head else n for n in self.nodes if n is head or n not in members]
+        return node
+    
+    def fuse_linear_chains(self):
+        """Fuse every maximal run of transform nodes joined by plain pipes.
+        
+        A node joins the run of its producer when it is that producer's
+        only consumer and has no other input. Sources, sinks, batch nodes
+        and nodes marked not ``fusable`` keep their own threads, and an
+        async pipe (~>) always keeps its queue so the user can still
+        decouple two stages explicitly.
+        """
+        incoming: Dict[PipelineNode, int] = defaultdict(int)
+        targets = {}
+        for _, target, queue in self.connections:
+            incoming[target] += 1
+            targets[queue] = target
+        
+        def fusable(node: PipelineNode) -> bool:
+            return (type(node) is PipelineNode and node.fusable
+                    and not node.is_source and not node.is_sink)
+        
+        def successor(node: PipelineNode) -> Optional[PipelineNode]:
+            if len(node.output_queues) != 1 or node.output_queues[0] in self.async_queues:
+                return None
+            following = targets.get(node.output_queues[0])
+            if following is None or not fusable(following) or incoming[following] != 1:
+                return None
+            return following
+        
+        linked = {successor(node) for node in self.nodes if fusable(node)}
+        for node in list(self.nodes):
+            if not fusable(node) or node in linked:
+                continue
+            chain = [node]
+            following = successor(node)
+            while following is not None:
+                chain.append(following)
+                following = successor(following)
+            if len(chain) > 1:
+                self.fuse_chain(chain, "+".join(n.name for n in chain))
+    
+    def batch_branches(self, branches: List[PipelineNode], name: str) -> PipelineNode:
+        """Replace sibling transform nodes that share one producer and one
+        consumer with a single node that runs them concurrently.
+        
+        Siblings read the same input frame, so the producer no longer
+        copies it once per branch.
+        """
+        members = set(branches)
+        producer = consumer = None
+        connections = []
+        for source, target, queue in self.connections:
+            if target in members:
+                producer = source
+                source.output_queues.remove(queue)
+            elif source in members:
+                consumer = target
+            else:
+                connections.append((source, target, queue))
+        
+        node = BranchBatchNode(name, [b.stage_call() for b in branches])
+        buffer_size = branches[0].input_queue.maxsize
+        index = min(self.nodes.index(b) for b in branches)
+        self.nodes = [n for n in self.nodes if n not in members]
+        self.nodes.insert(index, node)
+        self.connections = connections
+        self.connect(producer, node, buffer_size)
+        self.connect(node, consumer, buffer_size)
+        return node
     
     def start(self):
         """Start all nodes in the pipeline"""
+        self.fuse_linear_chains()
         self.running = True
+        self.done_event.clear()
+        if self.scheduler == "asyncio":
+            self.loop_thread = threading.Thread(target=asyncio.run, args=(self.run_async(),),
+                                                name="Pipeline-loop", daemon=True)
+            self.loop_thread.start()
+            return
+        self._live_nodes = len(self.nodes)
+        if not self.nodes:
+            self.done_event.set()
         for node in self.nodes:
+            node.on_finished = self._node_finished
             node.start()
     
+    def _node_finished(self):
+        with self._live_lock:
+            self._live_nodes -= 1
+            if self._live_nodes == 0:
+                self.done_event.set()
+    
+    async def run_async(self):
+        """Run every node as a task on the current event loop until all finish"""
+        self.loop = asyncio.get_running_loop()
+        # asyncio queues must be created on the loop that uses them
+        queues = {queue: asyncio.Queue(maxsize=queue.maxsize) for _, _, queue in self.connections}
+        executor = ThreadPoolExecutor(max_workers=max(len(self.nodes), 1),
+                                      thread_name_prefix="vidpipe-stage")
+        try:
+            self.tasks = [self.loop.create_task(node.run_async(executor, queues))
+                          for node in self.nodes]
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        finally:
+            executor.shutdown(wait=False)
+            self.done_event.set()
+    
     def stop(self):
         """Stop all nodes in the pipeline"""
         self.running = False
+        if self.loop_thread:
+            for node in self.nodes:
+                node.running = False
+            for task in self.tasks:
+                try:
+                    self.loop.call_soon_threadsafe(task.cancel)
+                except RuntimeError:
+                    break  # The loop already finished and closed
+            self.loop_thread.join(timeout=2.0)
+            return
+        for node in self.nodes:
+            node.running = False
+        # Nodes block on their queues without a timeout; closing every queue
+        # wakes them so they see the stop straight away
+        for node in self.nodes:
+            if node.input_queue is not None:
+                node.input_queue.close()
+            for queue in node.output_queues:
+                queue.close()
         for node in self.nodes:
             node.stop()
     
-    def wait(self):
-        """Wait for all nodes to finish"""
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for all nodes to finish.
+        
+        With a timeout, gives up after that many seconds and returns False
+        if the pipeline is still running; returns True once it has finished.
+        """
+        if timeout is not None and not self.done_event.wait(timeout):
+            return False
+        if self.loop_thread:
+            self.loop_thread.join()
         for node in self.nodes:
             if node.thread:
                 node.thread.join()
+        return True
     
     def is_alive(self) -> bool:
         """Check if pipeline is still running"""
+        if self.loop_thread:
+            return self.loop_thread.is_alive()
         return any(node.thread and node.thread.is_alive() for node in self.nodes)
\ No newline at end of file
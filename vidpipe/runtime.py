@@ -2,22 +2,70 @@
 Runtime engine for executing VidPipe pipelines
 """
 
-from typing import Dict, Any, Callable, Optional
+from typing import Dict, Any, Callable, Generator, List, Optional, Set
 from .ast_nodes import *
 from .pipeline import Pipeline, PipelineNode as ExecNode, Queue
-from .functions import FunctionRegistry
+from .functions import cv2, FunctionDef, FunctionRegistry
+
+
+# Time between display pumps while a pipeline runs (~60 Hz)
+_DISPLAY_INTERVAL = 1 / 60
+
+# Queue size for pipes without an explicit [n] buffer spec
+_DEFAULT_BUFFER = 10
+
+
+def default_merge(*frames, **kwargs):
+    """Merge used when none is registered: the first frame that is not None"""
+    # A plain loop measures faster than next(filter(...)) for the handful
+    # of frames a merge sees
+    for frame in frames:
+        if frame is not None:
+            return frame
+    return None
+
+
+# A composite node's compile step: yields child AST nodes, is sent back
+# their compiled result, and returns its own
+_Walk = Generator[ASTNode, Any, Any]
 
 
 class Runtime:
     """Runtime engine that executes AST"""
 
-    def __init__(self):
+    def __init__(self, scheduler: str = "threads"):
         self.registry = FunctionRegistry()
+        self.scheduler = scheduler
         self.pipeline = None
         self.node_map: Dict[str, ExecNode] = {}
         self.node_counter = 0
         self.pipeline_definitions: Dict[str, ASTNode] = {}
         self.timing_info: Dict[str, float] = {}
+        self._func_cache: Dict[str, Optional[FunctionDef]] = {}
+        # Names of the pipeline definitions currently being expanded
+        self._expanding: Set[str] = set()
+        # Compiled subgraph of each pipeline definition, cloned on reuse
+        self._ref_cache: Dict[str, tuple] = {}
+        # Graph edits of the current walk, applied in one Pipeline.build()
+        self._pending_nodes: List[ExecNode] = []
+        self._pending_edges: List[tuple] = []
+        # AST node classes are final, so an exact type lookup replaces the
+        # isinstance ladder. Leaves compile directly; composite nodes are
+        # walked by generators that yield the children they need compiled.
+        self._dispatch: Dict[type, Callable[[Any], Optional[ExecNode]]] = {
+            FunctionNode: self.compile_function,
+            # Pipeline definitions are handled separately
+            PipelineDefinitionNode: lambda node: None,
+        }
+        self._walkers: Dict[type, Callable[[Any], _Walk]] = {
+            PipelineNode: self._walk_pipeline,
+            ParallelNode: self._walk_parallel,
+            MergeNode: self._walk_merge,
+            ChoiceNode: self._walk_choice,
+            LoopNode: self._walk_loop,
+            PipelineReferenceNode: self._walk_pipeline_reference,
+            TimedPipelineNode: self._walk_timed_pipeline,
+        }
     
     def generate_node_id(self, base_name: str) -> str:
         """Generate unique node ID"""
@@ -26,11 +74,17 @@ class Runtime:
     
     def compile(self, ast: ProgramNode) -> Pipeline:
         """Compile AST into executable pipeline"""
-        self.pipeline = Pipeline()
+        self.pipeline = Pipeline(scheduler=self.scheduler)
         self.node_map = {}
         self.node_counter = 0
         self.pipeline_definitions = {}
         self.timing_info = {}
+        # Registrations may change between compiles, never during one
+        self._func_cache = {}
+        self._expanding = set()
+        self._ref_cache = {}
+        self._pending_nodes = []
+        self._pending_edges = []
 
         # Process pipeline definitions first
         for definition in ast.definitions:
@@ -39,110 +93,147 @@ class Runtime:
         # Process main pipeline if it exists
         if ast.main_pipeline:
             self.compile_node(ast.main_pipeline)
+            self.batch_parallel_branches()
+            # timing_info is keyed by node name, so timed nodes keep theirs
+            for exec_node in self.pipeline.nodes:
+                if exec_node.name in self.timing_info:
+                    exec_node.fusable = False
 
         return self.pipeline
     
+    def batch_parallel_branches(self):
+        """Run single-stage parallel branches as one concurrent batch.
+        
+        Siblings that read from the same producer and all feed the same
+        consumer are independent, so they can process each frame at the
+        same time on a shared input instead of one deep copy per branch.
+        """
+        inputs: Dict[ExecNode, list] = {}
+        outputs: Dict[ExecNode, list] = {}
+        for source, target, _ in self.pipeline.connections:
+            inputs.setdefault(target, []).append(source)
+            outputs.setdefault(source, []).append(target)
+        
+        groups: Dict[tuple, list] = {}
+        for node in self.pipeline.nodes:
+            if (node.is_source or node.is_sink or node.name in self.timing_info
+                    or len(inputs.get(node, ())) != 1 or len(outputs.get(node, ())) != 1):
+                continue
+            key = (inputs[node][0], outputs[node][0])
+            groups.setdefault(key, []).append(node)
+        
+        for (producer, consumer), branches in groups.items():
+            if len(branches) > 1 and len(inputs[consumer]) == len(branches):
+                self.pipeline.batch_branches(branches, "&".join(n.name for n in branches))
+    
     def compile_node(self, node: ASTNode) -> Optional[ExecNode]:
-        """Compile an AST node into executable pipeline nodes"""
+        """Compile an AST node into executable pipeline nodes.
         
-        if isinstance(node, FunctionNode):
-            return self.compile_function(node)
-
-        elif isinstance(node, PipelineNode):
-            return self.compile_pipeline(node)
-
-        elif isinstance(node, ParallelNode):
-            return self.compile_parallel(node)
-
-        elif isinstance(node, MergeNode):
-            return self.compile_merge(node)
-
-        elif isinstance(node, ChoiceNode):
-            return self.compile_choice(node)
-
-        elif isinstance(node, GroupNode):
-            return self.compile_node(node.content)
-
-        elif isinstance(node, LoopNode):
-            return self.compile_loop(node)
-
-        elif isinstance(node, PipelineReferenceNode):
-            return self.compile_pipeline_reference(node)
-
-        elif isinstance(node, TimedPipelineNode):
-            return self.compile_timed_pipeline(node)
-
-        elif isinstance(node, PipelineDefinitionNode):
-            # Pipeline definitions are handled separately
-            return None
-
-        else:
-            raise RuntimeError(f"Unknown node type: {type(node)}")
+        Walks the tree with an explicit stack of suspended walkers rather
+        than Python recursion, so long chains (which parse into deep
+        left-nested PipelineNodes) compile without hitting the recursion
+        limit. The nodes and edges the walk creates are handed to the
+        pipeline in one build() at the end.
+        """
+        stack: List[_Walk] = []
+        while True:
+            while type(node) is GroupNode:
+                node = node.content
+            walker = self._walkers.get(type(node))
+            if walker is not None:
+                stack.append(walker(node))
+                result = None
+            else:
+                handler = self._dispatch.get(type(node))
+                if handler is None:
+                    raise RuntimeError(f"Unknown node type: {type(node)}")
+                result = handler(node)
+            
+            # Hand the result to the innermost walker until one asks for
+            # another child, or the outermost one finishes
+            while stack:
+                try:
+                    node = stack[-1].send(result)
+                    break
+                except StopIteration as done:
+                    stack.pop()
+                    result = done.value
+            else:
+                self.pipeline.build(self._pending_nodes, self._pending_edges)
+                self._pending_nodes = []
+                self._pending_edges = []
+                return result
+    
+    def get_function(self, name: str) -> Optional[FunctionDef]:
+        """Look a function up in the registry, once per name per compile"""
+        try:
+            return self._func_cache[name]
+        except KeyError:
+            func_def = self._func_cache[name] = self.registry.get_function(name)
+            return func_def
     
     def compile_function(self, node: FunctionNode) -> ExecNode:
         """Compile a function node"""
-        func_def = self.registry.get_function(node.name)
+        func_def = self.get_function(node.name)
         if not func_def:
             raise RuntimeError(f"Unknown function: {node.name}")
         
         exec_node = ExecNode(
             name=self.generate_node_id(node.name),
             function=func_def.function,
-            params=node.params
+            params=dict(node.params)
         )
         exec_node.is_source = func_def.is_source
         exec_node.is_sink = func_def.is_sink
+        exec_node.accepts_dtype = func_def.accepts_dtype
         
-        self.pipeline.add_node(exec_node)
+        self._pending_nodes.append(exec_node)
         return exec_node
     
     def compile_pipeline(self, node: PipelineNode) -> Optional[ExecNode]:
         """Compile a pipeline connection"""
-        left_exec = self.compile_node(node.left)
-        right_exec = self.compile_node(node.right)
+        return self.compile_node(node)
+    
+    def _walk_pipeline(self, node: PipelineNode) -> _Walk:
+        left_exec = yield node.left
+        right_exec = yield node.right
         
         if left_exec and right_exec:
             # Determine buffer size and async mode
-            buffer_size = node.buffer_size if node.buffer_size else 10
-            async_mode = node.pipe_type == PipelineType.ASYNC
+            buffer_size = node.buffer_size or _DEFAULT_BUFFER
+            async_mode = node.pipe_type is PipelineType.ASYNC
             
-            # Handle different connection types
-            if isinstance(left_exec, list):
-                # Multiple outputs to single input
-                for left_node in left_exec:
-                    self.pipeline.connect(left_node, right_exec, buffer_size, async_mode)
-            elif isinstance(right_exec, list):
-                # Single output to multiple inputs (fan-out)
-                for right_node in right_exec:
-                    self.pipeline.connect(left_exec, right_node, buffer_size, async_mode)
-            else:
-                # Simple connection
-                self.pipeline.connect(left_exec, right_exec, buffer_size, async_mode)
+            # Parallel branches compile to lists; treating every side as one
+            # covers fan-in, fan-out and simple connections alike
+            lefts = left_exec if isinstance(left_exec, list) else (left_exec,)
+            rights = right_exec if isinstance(right_exec, list) else (right_exec,)
+            for left_node in lefts:
+                for right_node in rights:
+                    self._pending_edges.append((left_node, right_node, buffer_size, async_mode))
         
         return right_exec
     
     def compile_parallel(self, node: ParallelNode) -> list:
         """Compile parallel branches"""
+        return self.compile_node(node)
+    
+    def _walk_parallel(self, node: ParallelNode) -> _Walk:
         branches = []
         for branch in node.branches:
-            exec_node = self.compile_node(branch)
+            exec_node = yield branch
             if exec_node:
                 branches.append(exec_node)
         return branches
     
     def compile_merge(self, node: MergeNode) -> ExecNode:
         """Compile merge operation"""
+        return self.compile_node(node)
+    
+    def _walk_merge(self, node: MergeNode) -> _Walk:
         # Create a merge function node
-        merge_func = self.registry.get_function("merge")
+        merge_func = self.get_function("merge")
         if not merge_func:
-            # Create default merge function if not registered
-            def default_merge(*frames, **kwargs):
-                # Simple merge: return the first non-None frame
-                for frame in frames:
-                    if frame is not None:
-                        return frame
-                return None
-            
+            # Use the default merge function if none is registered
             merge_exec = ExecNode(
                 name=self.generate_node_id("merge"),
                 function=default_merge,
@@ -155,37 +246,40 @@ class Runtime:
                 params={}
             )
         
-        self.pipeline.add_node(merge_exec)
+        self._pending_nodes.append(merge_exec)
         
         # Connect inputs to merge
         for input_node in node.inputs:
-            input_exec = self.compile_node(input_node)
+            input_exec = yield input_node
             if input_exec:
-                if isinstance(input_exec, list):
-                    for exec_n in input_exec:
-                        self.pipeline.connect(exec_n, merge_exec, 10, False)
-                else:
-                    self.pipeline.connect(input_exec, merge_exec, 10, False)
+                for exec_n in input_exec if isinstance(input_exec, list) else (input_exec,):
+                    self._pending_edges.append((exec_n, merge_exec, _DEFAULT_BUFFER, False))
         
         # Connect merge to output
-        output_exec = self.compile_node(node.output)
+        output_exec = yield node.output
         if output_exec:
-            self.pipeline.connect(merge_exec, output_exec, 10, False)
+            self._pending_edges.append((merge_exec, output_exec, _DEFAULT_BUFFER, False))
         
         return output_exec
     
     def compile_choice(self, node: ChoiceNode) -> ExecNode:
         """Compile choice operation"""
+        return self.compile_node(node)
+    
+    def _walk_choice(self, node: ChoiceNode) -> _Walk:
         # For now, just compile the first option
         # In a full implementation, this would involve runtime selection
         if node.options:
-            return self.compile_node(node.options[0])
+            return (yield node.options[0])
         return None
     
     def compile_loop(self, node: LoopNode) -> ExecNode:
         """Compile loop construct"""
+        return self.compile_node(node)
+    
+    def _walk_loop(self, node: LoopNode) -> _Walk:
         # Create a loop wrapper that continuously executes the pipeline
-        pipeline_exec = self.compile_node(node.pipeline)
+        pipeline_exec = yield node.pipeline
 
         # In a real implementation, we'd need to handle loop feedback
         # For now, just return the pipeline
@@ -193,19 +287,78 @@ class Runtime:
 
     def compile_pipeline_reference(self, node: PipelineReferenceNode) -> Optional[ExecNode]:
         """Compile a pipeline reference - could be a defined pipeline or a function"""
+        return self.compile_node(node)
+    
+    def _walk_pipeline_reference(self, node: PipelineReferenceNode) -> _Walk:
         if node.name in self.pipeline_definitions:
             # This is a defined pipeline
-            return self.compile_node(self.pipeline_definitions[node.name])
+            template = self._ref_cache.get(node.name)
+            if template is not None:
+                return self.clone_definition(template)
+            
+            # Without recursion to stop it, a definition that uses itself
+            # would expand forever
+            if node.name in self._expanding:
+                raise RuntimeError(f"Pipeline '{node.name}' refers to itself")
+            self._expanding.add(node.name)
+            first_node = len(self._pending_nodes)
+            first_edge = len(self._pending_edges)
+            try:
+                result = yield self.pipeline_definitions[node.name]
+            finally:
+                self._expanding.discard(node.name)
+            
+            # The walk only creates and connects its own nodes, so the tail
+            # of both lists is exactly the definition's subgraph. Timings are
+            # taken now, before any reference wrapped in @ adds its own.
+            nodes = self._pending_nodes[first_node:]
+            timings = {n: self.timing_info[n.name] for n in nodes if n.name in self.timing_info}
+            self._ref_cache[node.name] = (nodes, self._pending_edges[first_edge:], timings, result)
+            return result
         else:
             # This might be a function call without parameters
             # Convert it to a FunctionNode and compile
             func_node = FunctionNode(node.name, {})
             return self.compile_function(func_node)
+    
+    def clone_definition(self, template: tuple) -> Any:
+        """Add a fresh copy of an already compiled pipeline definition.
+        
+        Each reference needs its own nodes, since they hold queues and
+        state, but not another walk of the definition's AST.
+        """
+        nodes, edges, timings, result = template
+        clones: Dict[ExecNode, ExecNode] = {}
+        for original in nodes:
+            clone = ExecNode(
+                name=self.generate_node_id(original.name.rpartition("_")[0]),
+                function=original.function,
+                params=dict(original.params)
+            )
+            clone.is_source = original.is_source
+            clone.is_sink = original.is_sink
+            clone.accepts_dtype = original.accepts_dtype
+            self._pending_nodes.append(clone)
+            clones[original] = clone
+            if original in timings:
+                self.timing_info[clone.name] = timings[original]
+        
+        self._pending_edges.extend((clones[source], clones[target], buffer_size, async_mode)
+                                   for source, target, buffer_size, async_mode in edges)
+        
+        def remap(exec_result):
+            if isinstance(exec_result, list):
+                return [remap(item) for item in exec_result]
+            return clones.get(exec_result, exec_result)
+        return remap(result)
 
     def compile_timed_pipeline(self, node: TimedPipelineNode) -> Optional[ExecNode]:
         """Compile a timed pipeline"""
+        return self.compile_node(node)
+    
+    def _walk_timed_pipeline(self, node: TimedPipelineNode) -> _Walk:
         # Compile the pipeline
-        pipeline_exec = self.compile_node(node.pipeline)
+        pipeline_exec = yield node.pipeline
 
         # Store timing information for execution
         if pipeline_exec:
@@ -219,11 +372,11 @@ class Runtime:
         pipeline.start()
 
         try:
-            # Wait for pipeline to complete or user interrupt
-            while pipeline.is_alive():
-                import time
-                time.sleep(0.1)
-
+            # Wait for pipeline to complete or user interrupt; the wait wakes
+            # as soon as the last node finishes, and between display ticks
+            # only when there is a display to pump
+            interval = _DISPLAY_INTERVAL if pump_display else None
+            while not pipeline.wait(interval):
                 if pump_display:
                     try:
                         result = pump_display()
@@ -238,7 +391,6 @@ class Runtime:
         finally:
             pipeline.stop()
             pipeline.wait()
-            if pump_display:
+            if pump_display and cv2 is not None:
                 # Clean up display windows
-                import cv2
                 cv2.destroyAllWindows()
\ No newline at end of file
@@ -2,12 +2,12 @@
 Token definitions for VidPipe language
 """
 
-from enum import Enum, auto
+from enum import IntEnum, auto
 from dataclasses import dataclass
 from typing import Any, Optional
 
 
-class TokenType(Enum):
+class TokenType(IntEnum):
     # Pipeline operators
     SYNC_PIPE = auto()        # ->
     ASYNC_PIPE = auto()       # ~>
@@ -41,6 +41,10 @@ class TokenType(Enum):
 
 @dataclass
 class Token:
+    # Spelled out rather than dataclass(slots=True), which needs Python 3.10;
+    # fine here because no field has a default
+    __slots__ = ("type", "value", "line", "column")
+
     type: TokenType
     value: Any
     line: int
@@ -4,7 +4,6 @@ Simple HTTP server to serve VidPipe web interface
 """
 
 import http.server
-import socketserver
 import os
 import sys
 from pathlib import Path
@@ -21,13 +20,30 @@ def main():
     PORT = 8080
     
     class CustomHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+        # CORS headers to allow webcam access, encoded once rather than
+        # formatted by send_header() on every response
+        _CORS = (b"Cross-Origin-Embedder-Policy: require-corp\r\n"
+                 b"Cross-Origin-Opener-Policy: same-origin\r\n")
+        
         def end_headers(self):
-            # Add CORS headers to allow webcam access
-            self.send_header('Cross-Origin-Embedder-Policy', 'require-corp')
-            self.send_header('Cross-Origin-Opener-Policy', 'same-origin')
+            # send_header() writes nothing for HTTP/0.9 either
+            if self.request_version != 'HTTP/0.9':
+                self._headers_buffer.append(self._CORS)
             super().end_headers()
+        
+        def copyfile(self, source, outputfile):
+            # wfile is unbuffered, so the headers are already out; hand the
+            # body to the kernel with sendfile() (socket.sendfile() falls back
+            # to plain sends where that is unavailable)
+            self.connection.sendfile(source)
     
-    with socketserver.TCPServer(("", PORT), CustomHTTPRequestHandler) as httpd:
+    class VidPipeHTTPServer(http.server.ThreadingHTTPServer):
+        # The editor fetches its assets in parallel; serve them on their own
+        # threads and let more connections queue than the default 5
+        request_queue_size = 128
+        daemon_threads = True
+    
+    with VidPipeHTTPServer(("", PORT), CustomHTTPRequestHandler) as httpd:
         print(f"VidPipe Web Server running at http://localhost:{PORT}/")
         print("Open your browser and navigate to the URL above to use VidPipe Web Editor")
         print("Press Ctrl+C to stop the server")